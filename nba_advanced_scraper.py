@@ -1,15 +1,22 @@
-import requests
 import time
-import json
 import os
+import sys
 
-# u5275u5efau76eeu9304u4f86u5132u5b58u722cu53d6u7684u8cc7u6599
-if not os.path.exists('nba_data_json'):
-    os.makedirs('nba_data_json')
+from nba_archive import archive_payload
+from nba_cache import ttl_for
+from nba_http import (configure_cache, configure_pool, configure_rate_limit, configure_retries, http_get, run_concurrently,
+                      run_serially)
+from nba_manifest import get_manifest
+from nba_resultset import decode_columns, first_record
+from nba_storage import load_table, record_exists, save_record, save_table, set_storage_format, table_exists
+from nba_telemetry import get_telemetry, write_summary
+
+# 儲存資料的目錄 (nba_data_json) 在寫入時才建立 (nba_storage / nba_manifest)
 
 # u57fau672cu8a2du7f6e
-base_url = 'https://www.nba.com'
-api_base_url = 'https://stats.nba.com/stats'
+# 可以用環境變數 NBA_BASE_URL / NBA_API_BASE_URL 改為本地的重播伺服器 (nba_replay.py)
+base_url = os.environ.get('NBA_BASE_URL', 'https://www.nba.com')
+api_base_url = os.environ.get('NBA_API_BASE_URL', 'https://stats.nba.com/stats')
 
 # u7528u65bcu767cu9001u8acbu6c42u7684u6a19u982d
 headers = {
@@ -27,12 +34,36 @@ endpoints = {
     'draft_history': 'drafthistory?College=&LeagueID=00&Overall_Pick=&RoundNum=&RoundPick=&Season=&TeamID=0' # u9078u79c0u6b77u53f2
 }
 
+# 增量模式：資料尚未過期時不重新抓取（--delta）
+delta_mode = False
+
+# 函數：判斷是否需要抓取；增量模式下只抓取已過期的資料
+# 略過的抓取函數回傳 False，與代表失敗的 None 區分，失敗的工作才會放回重試佇列
+def needs_fetch(key, endpoint):
+    if not delta_mode:
+        return True
+    manifest = get_manifest()
+    if manifest.is_stale(key, ttl_for(f'{api_base_url}/{endpoint}')):
+        return True
+    print(f'{key} 尚未過期，略過')
+    manifest.skip(key)
+    return False
+
+# 函數：內容有變動時才寫入資料表，並記錄到資料清單
+def save_artifact(key, path_base, columns):
+    changed = get_manifest().write_if_changed(
+        key, columns, lambda: save_table(path_base, columns), exists=lambda: table_exists(path_base)
+    )
+    if not changed:
+        print(f'{key} 內容沒有變動，不重寫檔案')
+    return changed
+
 # u51fdu6578uff1au722cu53d6APIu6578u64da
 def fetch_api_data(endpoint, params=None):
     url = f'{api_base_url}/{endpoint}'
     try:
         print(f'u6b63u5728u722cu53d6 API: {url}')
-        response = requests.get(url, headers=headers, params=params)
+        response = http_get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             try:
@@ -50,24 +81,17 @@ def fetch_api_data(endpoint, params=None):
 
 # u51fdu6578uff1au8655u7406u7af6u722du9663u5bb9u6578u64da
 def fetch_standings():
+    if not needs_fetch('standings', endpoints['standings']):
+        return False
     data = fetch_api_data(endpoints['standings'])
     if data and 'resultSets' in data:
-        standing_data = data['resultSets'][0]
-        headers = standing_data['headers']
-        rows = standing_data['rowSet']
-        
-        # u8f49u63dbu70bau66f4u6613u8655u7406u7684u5f62u5f0f
-        standings_list = []
-        for row in rows:
-            team_data = {}
-            for i, header in enumerate(headers):
-                team_data[header] = row[i]
-            standings_list.append(team_data)
+        # 直接以欄位式資料儲存，不需要逐列建立字典
+        columns = decode_columns(data['resultSets'][0])
         
         # u5132u5b58u8cc7u6599
-        with open('nba_data_json/standings.json', 'w', encoding='utf-8') as f:
-            json.dump(standings_list, f, ensure_ascii=False, indent=4)
+        save_artifact('standings', 'nba_data_json/standings', columns)
         print('u6210u529fu5132u5b58u7af6u722du9663u5bb9u6578u64da')
+        return columns
 
 # u51fdu6578uff1au8655u7406u8cfdu7a0bu8868
 def fetch_schedule():
@@ -75,13 +99,14 @@ def fetch_schedule():
     try:
         url = f'{base_url}/schedule'
         print(f'u6b63u5728u722cu53d6u8cfdu7a0bu8868: {url}')
-        response = requests.get(url, headers=headers)
+        response = http_get(url, headers=headers)
         
         if response.status_code == 200:
-            # u5132u5b58u539fu59cb HTML
-            with open('nba_data_json/schedule_raw.html', 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            print('u6210u529fu5132u5b58u8cfdu7a0bu8868HTML')
+            # 賽程表只封存在 nba_archive（不再寫入 nba_data_json/schedule_raw.html），內容相同時只記錄抓取時間
+            # 沒有輸出檔案，因此不記錄到資料清單；需要時以 python nba_archive.py schedule schedule 取出
+            archive_payload('schedule', 'schedule', response.content)
+            print('已封存賽程表HTML到 nba_archive')
+            return True
         else:
             print(f'u8acbu6c42u5931u6557uff0cu72c0u614bu78bc: {response.status_code}')
     except Exception as e:
@@ -89,48 +114,34 @@ def fetch_schedule():
 
 # u51fdu6578uff1au8655u7406u7403u54e1u8cc7u6599
 def fetch_players():
+    if not needs_fetch('players', endpoints['players']):
+        return False
     data = fetch_api_data(endpoints['players'])
     if data and 'resultSets' in data:
-        players_data = data['resultSets'][0]
-        headers = players_data['headers']
-        rows = players_data['rowSet']
-        
-        # u8f49u63dbu70bau66f4u6613u8655u7406u7684u5f62u5f0f
-        players_list = []
-        for row in rows:
-            player_data = {}
-            for i, header in enumerate(headers):
-                player_data[header] = row[i]
-            players_list.append(player_data)
+        # 直接以欄位式資料儲存，不需要逐列建立字典
+        columns = decode_columns(data['resultSets'][0])
         
         # u5132u5b58u8cc7u6599
-        with open('nba_data_json/players.json', 'w', encoding='utf-8') as f:
-            json.dump(players_list, f, ensure_ascii=False, indent=4)
+        save_artifact('players', 'nba_data_json/players', columns)
         print('u6210u529fu5132u5b58u7403u54e1u6578u64da')
+        return columns
 
 # u51fdu6578uff1au8655u7406u9078u79c0u6b77u53f2
 def fetch_draft_history():
+    if not needs_fetch('draft_history', endpoints['draft_history']):
+        return False
     data = fetch_api_data(endpoints['draft_history'])
     if data and 'resultSets' in data:
-        draft_data = data['resultSets'][0]
-        headers = draft_data['headers']
-        rows = draft_data['rowSet']
-        
-        # u8f49u63dbu70bau66f4u6613u8655u7406u7684u5f62u5f0f
-        draft_list = []
-        for row in rows:
-            draft_record = {}
-            for i, header in enumerate(headers):
-                draft_record[header] = row[i]
-            draft_list.append(draft_record)
+        # 直接以欄位式資料儲存，不需要逐列建立字典
+        columns = decode_columns(data['resultSets'][0])
         
         # u5132u5b58u8cc7u6599
-        with open('nba_data_json/draft_history.json', 'w', encoding='utf-8') as f:
-            json.dump(draft_list, f, ensure_ascii=False, indent=4)
+        save_artifact('draft_history', 'nba_data_json/draft_history', columns)
         print('u6210u529fu5132u5b58u9078u79c0u6b77u53f2u6578u64da')
+        return columns
 
-# u51fdu6578uff1au722cu53d6u7403u968au8cc7u6599
-def fetch_team_info(team_id):
+# 函數：取得球隊的基本資料與統計資料（不寫入檔案），失敗時回傳 None
+def fetch_team_data(team_id):
     endpoint = f'teaminfocommon?TeamID={team_id}&LeagueID=00'
     data = fetch_api_data(endpoint)
     
@@ -138,59 +149,162 @@ def fetch_team_info(team_id):
         team_info = data['resultSets'][0]
         team_stats = data['resultSets'][1] if len(data['resultSets']) > 1 else None
         
-        # u6574u7406u7403u968au8cc7u6599
-        team_data = {
-            'info': {},
-            'stats': {}
+        # 整理球隊資料（基本資料與統計資料各只有一列）
+        return {
+            'info': first_record(team_info),
+            'stats': first_record(team_stats)
         }
-        
-        # u8655u7406u57fau672cu8cc7u6599
-        for i, header in enumerate(team_info['headers']):
-            if team_info['rowSet'] and len(team_info['rowSet']) > 0:
-                team_data['info'][header] = team_info['rowSet'][0][i]
-        
-        # u8655u7406u7d71u8a08u8cc7u6599
-        if team_stats and team_stats['rowSet'] and len(team_stats['rowSet']) > 0:
-            for i, header in enumerate(team_stats['headers']):
-                team_data['stats'][header] = team_stats['rowSet'][0][i]
-        
+    return None
+
+# u51fdu6578uff1au722cu53d6u7403u968au8cc7u6599
+def fetch_team_info(team_id):
+    key = f'team_{team_id}'
+    if not needs_fetch(key, 'teaminfocommon'):
+        return False
+    team_data = fetch_team_data(team_id)
+    if team_data:
         # u5132u5b58u8cc7u6599
-        with open(f'nba_data_json/team_{team_id}.json', 'w', encoding='utf-8') as f:
-            json.dump(team_data, f, ensure_ascii=False, indent=4)
+        path_base = f'nba_data_json/team_{team_id}'
+        get_manifest().write_if_changed(key, team_data, lambda: save_record(path_base, team_data),
+                                        exists=lambda: record_exists(path_base))
         print(f'u6210u529fu5132u5b58u7403u968a ID {team_id} u7684u8cc7u6599')
+        return team_data
 
-# u4e3bu51fdu6578
-def main():
-    print('u958bu59cbu722cu53d6 NBA u6578u64da...')
-    
-    # u722cu53d6u6392u540du8cc7u6599
-    print('\nu6b63u5728u722cu53d6u6392u540du8cc7u6599...')
-    fetch_standings()
-    time.sleep(2)  # u907fu514du8acbu6c42u904eu65bcu983bu7e41
-    
-    # u722cu53d6u8cfdu7a0bu8868
-    print('\nu6b63u5728u722cu53d6u8cfdu7a0bu8868...')
-    fetch_schedule()
-    time.sleep(2)  # u907fu514du8acbu6c42u904eu65bcu983bu7e41
-    
-    # u722cu53d6u7403u54e1u8cc7u6599
-    print('\nu6b63u5728u722cu53d6u7403u54e1u8cc7u6599...')
-    fetch_players()
-    time.sleep(2)  # u907fu514du8acbu6c42u904eu65bcu983bu7e41
-    
-    # u722cu53d6u9078u79c0u6b77u53f2
-    print('\nu6b63u5728u722cu53d6u9078u79c0u6b77u53f2...')
-    fetch_draft_history()
-    time.sleep(2)  # u907fu514du8acbu6c42u904eu65bcu983bu7e41
-    
-    # u722cu53d6u90e8u5206u7403u968au8cc7u6599uff08u7bc4u4f8buff09
-    print('\nu6b63u5728u722cu53d6u90e8u5206u7403u968au8cc7u6599...')
+# 函數：從排名資料取得所有球隊 ID（沒有提供時讀取已儲存的排名資料）
+def get_team_ids(standings=None):
+    if standings is None:
+        standings = load_table('nba_data_json/standings')
+        if standings is None:
+            return []
+    for column in ('TeamID', 'TEAM_ID'):
+        if column in standings:
+            return [int(team_id) for team_id in standings[column]]
+    print('排名資料中找不到球隊 ID 欄位')
+    return []
+
+# 函數：把球隊的基本資料與統計資料合併為一列
+def flatten_team_data(team_data):
+    row = dict(team_data['info'])
+    for key, value in team_data['stats'].items():
+        row.setdefault(key, value)
+    return row
+
+# 函數：依排名資料中的所有球隊，同時爬取每支球隊的資料並合併為一個資料表
+def sweep_all_teams(max_workers=None, retry_rounds=1):
+    if not needs_fetch('teams', 'teaminfocommon'):
+        return {}, {}
+    # 先取得最新排名，取得失敗或略過時改用已儲存的排名資料
+    standings = fetch_standings() or None
+    team_ids = get_team_ids(standings)
+    if not team_ids:
+        print('無法取得球隊列表')
+        return {}, {}
+    print(f'共 {len(team_ids)} 支球隊，開始同時爬取...')
+
+    tasks = [(team_id, fetch_team_data, (team_id,)) for team_id in team_ids]
+    results, timings = run_concurrently(tasks, max_workers=max_workers, retry_rounds=retry_rounds)
+
+    rows = [flatten_team_data(results[team_id]) for team_id in team_ids if results.get(team_id)]
+    missing = [team_id for team_id in team_ids if not results.get(team_id)]
+    if rows:
+        save_artifact('teams', 'nba_data_json/teams', rows)
+        print(f'成功儲存 {len(rows)} 支球隊的資料到 nba_data_json/teams')
+    if missing:
+        print(f'以下球隊爬取失敗: {missing}')
+    return results, timings
+
+# 函數：解析命令列參數
+def parse_args(argv):
+    options = {'serial': False, 'workers': None, 'rate': None, 'pool': None, 'cache': True, 'format': None,
+               'all_teams': False, 'delta': False, 'retries': None, 'timeout': None, 'retry_rounds': 1}
+    for arg in argv:
+        if arg == '--serial':
+            options['serial'] = True
+        elif arg == '--delta':
+            options['delta'] = True
+        elif arg == '--all-teams':
+            options['all_teams'] = True
+        elif arg.startswith('--workers='):
+            options['workers'] = int(arg.split('=', 1)[1])
+        elif arg.startswith('--rate='):
+            options['rate'] = float(arg.split('=', 1)[1])
+        elif arg == '--no-cache':
+            options['cache'] = False
+        elif arg.startswith('--format='):
+            options['format'] = arg.split('=', 1)[1]
+        elif arg.startswith('--pool='):
+            options['pool'] = int(arg.split('=', 1)[1])
+        elif arg.startswith('--retries='):
+            options['retries'] = int(arg.split('=', 1)[1])
+        elif arg.startswith('--timeout='):
+            options['timeout'] = float(arg.split('=', 1)[1])
+        elif arg.startswith('--retry-rounds='):
+            options['retry_rounds'] = int(arg.split('=', 1)[1])
+    return options
+
+# 函數：建立本次要執行的抓取工作
+def build_tasks():
+    tasks = [
+        ('standings', fetch_standings, ()),
+        ('schedule', fetch_schedule, ()),
+        ('players', fetch_players, ()),
+        ('draft_history', fetch_draft_history, ()),
+    ]
     # u5e38u898bu7684u7403u968a ID
     team_ids = [1610612738, 1610612742, 1610612744]  # u7af6u722du9663u5bb9u6578u64dau4e2du53efu4ee5u627eu5230u66f4u591au7684u7403u968a ID
     for team_id in team_ids:
-        fetch_team_info(team_id)
-        time.sleep(2)  # u907fu514du8acbu6c42u904eu65bcu983bu7e41
-    
+        tasks.append((f'team_{team_id}', fetch_team_info, (team_id,)))
+    return tasks
+
+# u4e3bu51fdu6578
+def main():
+    global delta_mode
+    options = parse_args(sys.argv[1:])
+    delta_mode = options['delta']
+    if options['rate']:
+        configure_rate_limit('stats.nba.com', options['rate'])
+    if options['pool']:
+        configure_pool(maxsize=options['pool'])
+    configure_cache(enabled=options['cache'])
+    configure_retries(retries=options['retries'], timeout=options['timeout'])
+    if options['format']:
+        set_storage_format(options['format'])
+
+    print('u958bu59cbu722cu53d6 NBA u6578u64da...')
+    tasks = build_tasks()
+
+    network_before = get_telemetry().summary()['network_seconds']
+    started = time.perf_counter()
+    if options['all_teams']:
+        # 聯盟所有球隊：依排名資料中的球隊 ID 同時爬取，輸出單一資料表
+        results, timings = sweep_all_teams(max_workers=options['workers'], retry_rounds=options['retry_rounds'])
+    elif options['serial']:
+        # 依序執行，每次請求後等待 2 秒（原本的做法）
+        results, timings = run_serially(tasks, delay=2)
+    else:
+        # 同時執行所有工作，由權杖桶控制每個主機的請求速率
+        results, timings = run_concurrently(tasks, max_workers=options['workers'], retry_rounds=options['retry_rounds'])
+    elapsed = time.perf_counter() - started
+
+    # 估算原本依序執行所需的時間：實際送出請求的耗時（遙測記錄的延遲，不含等待權杖與重試退避），
+    # 加上每個有執行的工作之後 2 秒的等待；增量模式中略過的工作 (回傳 False) 不計入
+    network_seconds = get_telemetry().summary()['network_seconds'] - network_before
+    executed = sum(1 for result in results.values() if result is not False)
+    serial_baseline = network_seconds + 2 * executed
+    print(f'\n本次執行耗時: {elapsed:.1f} 秒')
+    if not options['serial'] and elapsed > 0:
+        print(f'依序執行的估計耗時: {serial_baseline:.1f} 秒 (加速 {serial_baseline / elapsed:.1f} 倍)')
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        print(f'  {name}: {seconds:.2f} 秒')
+
+    failed = [name for name, result in results.items() if result is None]
+    if failed:
+        print(f'重試後仍然失敗的工作: {failed}')
+
+    # 寫入本次有變動的資料清單 (nba_data_json/changed_keys.json)
+    get_manifest().write_changes()
+    write_summary('nba_advanced_scraper')
+
     print('\nu6240u6709u6578u64dau722cu53d6u5b8cu6210uff01')
 
 if __name__ == '__main__':
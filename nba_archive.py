@@ -0,0 +1,255 @@
+import gzip
+import hashlib
+import io
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# 原始回應封存：API 回應與球員頁面 HTML 壓縮後依內容雜湊儲存，內容相同的回應只存一份。
+# 索引 (index.sqlite) 記錄 (端點, 鍵, 抓取時間) 對應的內容雜湊，需要時可以取回原始內容重新解析。
+#   nba_archive/index.sqlite
+#   nba_archive/blobs/<雜湊前兩碼>/<雜湊>.zst（或 .gz）
+archive_dir = 'nba_archive'
+
+# 安裝 zstandard 時使用 zstd（壓縮率與速度都較好），否則使用標準函式庫的 gzip
+try:
+    import zstandard
+    default_codec = 'zstd'
+except ImportError:
+    zstandard = None
+    default_codec = 'gzip'
+
+extensions = {
+    'zstd': '.zst',
+    'gzip': '.gz',
+}
+
+# 壓縮等級
+compression_levels = {
+    'zstd': 10,
+    'gzip': 6,
+}
+
+chunk_size = 64 * 1024
+
+# 函數：計算檔案內容的雜湊值（逐塊讀取）
+def _hash_stream(stream):
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+# 原始回應封存
+class RawArchive:
+    def __init__(self, directory=None, codec=None):
+        self.directory = directory or archive_dir
+        self.codec = codec or default_codec
+        self.lock = threading.Lock()
+        self.db = None
+
+    def _connect(self):
+        if self.db is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.db = sqlite3.connect(os.path.join(self.directory, 'index.sqlite'), check_same_thread=False)
+            self.db.execute('''CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                codec TEXT,
+                size INTEGER,
+                stored_size INTEGER
+            )''')
+            self.db.execute('''CREATE TABLE IF NOT EXISTS payloads (
+                endpoint TEXT,
+                key TEXT,
+                fetched_at REAL,
+                digest TEXT
+            )''')
+            self.db.execute('CREATE INDEX IF NOT EXISTS payloads_lookup ON payloads (endpoint, key, fetched_at)')
+            self.db.commit()
+        return self.db
+
+    def _blob_path(self, digest, codec):
+        return os.path.join(self.directory, 'blobs', digest[:2], digest + extensions[codec])
+
+    def _write_blob(self, stream, path):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # 每次寫入使用不同的暫存檔，多個執行緒同時封存相同內容時不會互相截斷
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if self.codec == 'zstd':
+                    zstandard.ZstdCompressor(level=compression_levels['zstd']).copy_stream(stream, f)
+                else:
+                    with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=compression_levels['gzip'], mtime=0) as gz:
+                        shutil.copyfileobj(stream, gz, chunk_size)
+            # 其他執行緒已經寫入相同內容時保留已有的檔案
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return os.path.getsize(path)
+
+    def _put_stream(self, endpoint, key, stream):
+        digest, size = _hash_stream(stream)
+        stream.seek(0)
+        with self.lock:
+            row = self._connect().execute('SELECT codec FROM blobs WHERE digest = ?', (digest,)).fetchone()
+        # 壓縮在鎖外進行，多個執行緒可以同時封存；各自寫入暫存檔，只有第一個完成的會成為內容檔案
+        if row is None or not os.path.exists(self._blob_path(digest, row[0])):
+            stored_size = self._write_blob(stream, self._blob_path(digest, self.codec))
+            row = None
+        with self.lock:
+            db = self._connect()
+            if row is None:
+                db.execute('INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?)', (digest, self.codec, size, stored_size))
+            db.execute('INSERT INTO payloads VALUES (?, ?, ?, ?)', (endpoint, str(key), time.time(), digest))
+            db.commit()
+        return digest
+
+    def put(self, endpoint, key, body):
+        """封存一份回應內容（bytes 或 str），回傳內容雜湊"""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        return self._put_stream(endpoint, key, io.BytesIO(body))
+
+    def put_file(self, endpoint, key, path):
+        """封存檔案內容（逐塊讀取與壓縮，不把整個檔案讀進記憶體），回傳內容雜湊"""
+        with open(path, 'rb') as f:
+            return self._put_stream(endpoint, key, f)
+
+    def read_blob(self, digest):
+        with self.lock:
+            row = self._connect().execute('SELECT codec FROM blobs WHERE digest = ?', (digest,)).fetchone()
+        if row is None:
+            return None
+        codec = row[0]
+        with open(self._blob_path(digest, codec), 'rb') as f:
+            if codec == 'zstd':
+                return zstandard.ZstdDecompressor().stream_reader(f).read()
+            with gzip.GzipFile(fileobj=f, mode='rb') as gz:
+                return gz.read()
+
+    def latest(self, endpoint, key):
+        """取得最近一次封存的內容（沒有時回傳 None）"""
+        with self.lock:
+            row = self._connect().execute(
+                'SELECT digest FROM payloads WHERE endpoint = ? AND key = ? ORDER BY fetched_at DESC LIMIT 1',
+                (endpoint, str(key))
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return self.read_blob(row[0])
+        except OSError:
+            return None
+
+    def has(self, endpoint, key):
+        with self.lock:
+            row = self._connect().execute(
+                'SELECT 1 FROM payloads WHERE endpoint = ? AND key = ? LIMIT 1', (endpoint, str(key))
+            ).fetchone()
+        return row is not None
+
+    def history(self, endpoint, key):
+        """列出某個鍵每次抓取的 (抓取時間, 內容雜湊)"""
+        with self.lock:
+            return self._connect().execute(
+                'SELECT fetched_at, digest FROM payloads WHERE endpoint = ? AND key = ? ORDER BY fetched_at',
+                (endpoint, str(key))
+            ).fetchall()
+
+    def stats(self):
+        with self.lock:
+            db = self._connect()
+            payloads = db.execute('SELECT COUNT(*) FROM payloads').fetchone()[0]
+            blobs, size, stored_size = db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs'
+            ).fetchone()
+            # 不去除重複時需要寫入的位元組數
+            raw_size = db.execute(
+                'SELECT COALESCE(SUM(b.size), 0) FROM payloads p JOIN blobs b ON p.digest = b.digest'
+            ).fetchone()[0]
+        return {'payloads': payloads, 'blobs': blobs, 'raw_bytes': raw_size, 'unique_bytes': size,
+                'stored_bytes': stored_size}
+
+_archive = None
+_archive_lock = threading.Lock()
+
+# 函數：取得共用的原始回應封存
+def get_archive():
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = RawArchive()
+        return _archive
+
+# 函數：封存一份回應內容
+def archive_payload(endpoint, key, body):
+    return get_archive().put(endpoint, key, body)
+
+# 函數：封存檔案內容
+def archive_file(endpoint, key, path):
+    return get_archive().put_file(endpoint, key, path)
+
+# 函數：取得最近一次封存的內容（沒有時回傳 None）
+def load_payload(endpoint, key):
+    return get_archive().latest(endpoint, key)
+
+# 舊版直接寫入的原始檔案：(目錄, 檔名格式, 端點)
+legacy_patterns = [
+    ('nba_player_data', re.compile(r'^player_(\d+)_stats_raw\.json$'), 'playercareerstats'),
+    ('nba_player_data', re.compile(r'^player_(\d+)_profile\.html$'), 'player_profile'),
+    ('nba_data_json', re.compile(r'^(schedule)_raw\.html$'), 'schedule'),
+]
+
+# 函數：把舊版的原始檔案匯入封存並刪除原檔，回傳匯入的檔案數
+def import_legacy_files():
+    archive = get_archive()
+    imported = 0
+    for directory, pattern, endpoint in legacy_patterns:
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            match = pattern.match(filename)
+            if not match:
+                continue
+            path = os.path.join(directory, filename)
+            archive.put_file(endpoint, match.group(1), path)
+            os.remove(path)
+            imported += 1
+    return imported
+
+if __name__ == '__main__':
+    # 用法:
+    #   python nba_archive.py                          顯示封存統計
+    #   python nba_archive.py <端點> <鍵> [輸出檔案]    取出最近一次的原始內容
+    #   python nba_archive.py --import-legacy          匯入舊版的原始檔案並刪除原檔
+    if '--import-legacy' in sys.argv:
+        print(f'已匯入 {import_legacy_files()} 個舊版原始檔案')
+    elif len(sys.argv) >= 3:
+        body = load_payload(sys.argv[1], sys.argv[2])
+        if body is None:
+            print(f'找不到封存內容: {sys.argv[1]} {sys.argv[2]}')
+        elif len(sys.argv) > 3:
+            with open(sys.argv[3], 'wb') as f:
+                f.write(body)
+            print(f'已寫入: {sys.argv[3]} ({len(body)} bytes)')
+        else:
+            sys.stdout.write(body.decode('utf-8', errors='replace'))
+    else:
+        stats = get_archive().stats()
+        ratio = stats['raw_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0
+        print(f"封存 {stats['payloads']} 份回應，{stats['blobs']} 個不重複內容")
+        print(f"原始大小 {stats['raw_bytes'] / 1024:.0f} KB，儲存大小 {stats['stored_bytes'] / 1024:.0f} KB "
+              f"(壓縮 {ratio:.1f} 倍，使用 {get_archive().codec})")
@@ -0,0 +1,324 @@
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from nba_http import backoff_delay, http_get
+from nba_resultset import decode_columns
+
+# 歷史球員回填：把所有曾經出賽的球員（不只現役）的生涯統計數據都爬下來。
+# 工作佇列存放在 SQLite，每位球員一個 playercareerstats 工作：
+#   - 工作者領取工作時取得租約 (lease)，完成後標記為 done；程式中斷或當機時租約到期，工作會被其他工作者重新領取
+#   - 失敗的工作延後重試，超過次數上限標記為 failed
+#   - 以 --shard=i/n 依 PERSON_ID 分片，多個程序或多台機器各自處理一部分
+# 用法:
+#   python nba_backfill.py seed [--shard=0/2]              從 commonallplayers（所有球季）建立工作
+#   python nba_backfill.py run [--workers=4] [--shard=0/2] [--lease=300]
+#   python nba_backfill.py status [--shard=0/2]            顯示進度與預估剩餘時間
+#   python nba_backfill.py retry-failed                    把失敗的工作重新排入佇列
+backfill_dir = 'nba_backfill'
+
+# 可以用環境變數 NBA_API_BASE_URL 改為本地的重播伺服器 (nba_replay.py)
+api_base_url = os.environ.get('NBA_API_BASE_URL', 'https://stats.nba.com/stats')
+all_players_endpoint = 'commonallplayers?LeagueID=00&Season=2024-25&IsOnlyCurrentSeason=0'
+
+headers = {
+    'Referer': 'https://www.nba.com/',
+    'Accept': 'application/json, text/plain, */*',
+}
+
+# 租約長度（秒）：超過這個時間沒有完成的工作視為工作者已中斷
+default_lease_seconds = 300
+
+# 每個工作最多嘗試的次數
+max_attempts = 5
+
+# 進度輸出的間隔（秒）
+progress_interval = 30
+
+# 計算速率時只看最近這段時間完成的工作（秒）
+rate_window = 600
+
+# 函數：解析 --shard=i/n，回傳 (i, n)
+def parse_shard(value):
+    index, count = (int(part) for part in value.split('/', 1))
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f'無效的分片: {value}')
+    return index, count
+
+# 回填工作佇列
+class JobQueue:
+    def __init__(self, directory=None, shard=(0, 1)):
+        self.directory = directory or backfill_dir
+        self.shard = shard
+        self.lock = threading.Lock()
+        self.db = None
+
+    def _connect(self):
+        if self.db is None:
+            os.makedirs(self.directory, exist_ok=True)
+            # 多個程序共用同一個佇列檔時，寫入以 BEGIN IMMEDIATE 取得資料庫鎖，等待其他程序最多 30 秒
+            self.db = sqlite3.connect(os.path.join(self.directory, 'queue.sqlite'), timeout=30,
+                                      check_same_thread=False, isolation_level=None)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                player_id INTEGER PRIMARY KEY,
+                name TEXT,
+                from_year TEXT,
+                to_year TEXT,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                available_at REAL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                updated_at REAL,
+                error TEXT
+            )''')
+            self.db.execute('CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, available_at)')
+        return self.db
+
+    def _shard_filter(self):
+        index, count = self.shard
+        return f'player_id % {count} = {index}'
+
+    def add(self, players):
+        """加入工作（已存在的球員不會重複加入），回傳新增的數量"""
+        index, count = self.shard
+        rows = [(p['PERSON_ID'], p.get('DISPLAY_FIRST_LAST'), p.get('FROM_YEAR'), p.get('TO_YEAR'), time.time())
+                for p in players if int(p['PERSON_ID']) % count == index]
+        with self.lock:
+            db = self._connect()
+            before = db.total_changes
+            db.execute('BEGIN IMMEDIATE')
+            db.executemany(
+                'INSERT OR IGNORE INTO jobs (player_id, name, from_year, to_year, updated_at) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            db.execute('COMMIT')
+            return db.total_changes - before
+
+    def claim(self, owner, lease_seconds=default_lease_seconds):
+        """領取一個工作：待處理且已到重試時間的工作，或租約已過期的工作；沒有工作時回傳 None"""
+        now = time.time()
+        with self.lock:
+            db = self._connect()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                row = db.execute(
+                    f'''SELECT player_id, name, attempts FROM jobs
+                        WHERE {self._shard_filter()}
+                          AND ((status = 'pending' AND available_at <= ?) OR (status = 'leased' AND lease_expires < ?))
+                        ORDER BY player_id LIMIT 1''',
+                    (now, now)
+                ).fetchone()
+                if row is not None:
+                    db.execute(
+                        "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, updated_at = ? "
+                        'WHERE player_id = ?',
+                        (owner, now + lease_seconds, now, row[0])
+                    )
+                db.execute('COMMIT')
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+        return row
+
+    def complete(self, player_id, owner):
+        """標記工作完成；租約已被其他工作者取走時回傳 False"""
+        return self._finish(player_id, owner, "status = 'done', error = NULL", ())
+
+    def fail(self, player_id, owner, attempts, error):
+        """標記工作失敗：延後重試，超過次數上限時標記為 failed"""
+        attempts += 1
+        if attempts >= max_attempts:
+            return self._finish(player_id, owner, "status = 'failed', attempts = ?, error = ?", (attempts, error))
+        return self._finish(player_id, owner, "status = 'pending', attempts = ?, available_at = ?, error = ?",
+                            (attempts, time.time() + backoff_delay(attempts), error))
+
+    def _finish(self, player_id, owner, assignments, values):
+        with self.lock:
+            db = self._connect()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                cursor = db.execute(
+                    f"UPDATE jobs SET {assignments}, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                    "WHERE player_id = ? AND status = 'leased' AND lease_owner = ?",
+                    values + (time.time(), player_id, owner)
+                )
+                db.execute('COMMIT')
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+        return cursor.rowcount == 1
+
+    def has_work(self):
+        """是否還有尚未完成的工作（包含其他工作者持有租約的工作）"""
+        with self.lock:
+            row = self._connect().execute(
+                f"SELECT 1 FROM jobs WHERE {self._shard_filter()} AND status IN ('pending', 'leased') LIMIT 1"
+            ).fetchone()
+        return row is not None
+
+    def retry_failed(self):
+        with self.lock:
+            db = self._connect()
+            db.execute('BEGIN IMMEDIATE')
+            cursor = db.execute(
+                f"UPDATE jobs SET status = 'pending', attempts = 0, available_at = 0 "
+                f"WHERE {self._shard_filter()} AND status = 'failed'"
+            )
+            db.execute('COMMIT')
+        return cursor.rowcount
+
+    def progress(self):
+        """回傳各狀態的工作數、最近的完成速率（每秒）與預估剩餘秒數"""
+        now = time.time()
+        with self.lock:
+            db = self._connect()
+            counts = dict(db.execute(
+                f'SELECT status, COUNT(*) FROM jobs WHERE {self._shard_filter()} GROUP BY status'
+            ).fetchall())
+            recent, first_done = db.execute(
+                f"SELECT COUNT(*), MIN(updated_at) FROM jobs "
+                f"WHERE {self._shard_filter()} AND status = 'done' AND updated_at >= ?",
+                (now - rate_window,)
+            ).fetchone()
+        remaining = counts.get('pending', 0) + counts.get('leased', 0)
+        elapsed = now - first_done if first_done else 0
+        rate = recent / elapsed if elapsed > 0 else 0.0
+        return {
+            'total': sum(counts.values()),
+            'done': counts.get('done', 0),
+            'pending': counts.get('pending', 0),
+            'leased': counts.get('leased', 0),
+            'failed': counts.get('failed', 0),
+            'rate': rate,
+            'eta_seconds': remaining / rate if rate > 0 else None,
+        }
+
+# 函數：把秒數轉換為 1h02m 的格式
+def format_duration(seconds):
+    if seconds is None:
+        return '未知'
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}h{minutes:02d}m' if hours else f'{minutes}m{seconds:02d}s'
+
+# 函數：輸出進度
+def print_progress(queue):
+    p = queue.progress()
+    percent = p['done'] / p['total'] * 100 if p['total'] else 0
+    print(f"回填進度：{p['done']}/{p['total']} ({percent:.1f}%)，處理中 {p['leased']}，"
+          f"待處理 {p['pending']}，失敗 {p['failed']}，速率 {p['rate'] * 60:.1f} 位/分鐘，"
+          f"預估剩餘 {format_duration(p['eta_seconds'])}")
+    return p
+
+# 函數：從 commonallplayers（所有球季）取得歷史上所有球員並加入佇列
+def seed(queue):
+    response = http_get(f'{api_base_url}/{all_players_endpoint}', headers=headers)
+    if response.status_code != 200:
+        print(f'下載歷史球員名單失敗，狀態碼: {response.status_code}')
+        return None
+    data = response.json()
+    if not data.get('resultSets'):
+        print('無法解析球員資料')
+        return None
+    columns = decode_columns(data['resultSets'][0])
+    players = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    added = queue.add(players)
+    print(f'歷史球員 {len(players)} 位，新增 {added} 個工作')
+    return added
+
+# 函數：工作者迴圈，持續領取並處理工作，直到佇列中沒有可領取的工作
+def _work(queue, owner, lease_seconds, stop):
+    from player_specific_scraper import fetch_player_stats
+
+    processed = 0
+    while not stop.is_set():
+        job = queue.claim(owner, lease_seconds)
+        if job is None:
+            # 其他工作者仍持有租約時稍後再看，租約過期的工作會被重新領取
+            if not queue.has_work():
+                break
+            stop.wait(min(lease_seconds, 5))
+            continue
+        player_id, name, attempts = job
+        try:
+            ok = fetch_player_stats(player_id) is not None
+            error = None if ok else '爬取統計數據失敗'
+        except Exception as e:
+            ok, error = False, str(e)
+        if ok:
+            queue.complete(player_id, owner)
+        else:
+            print(f'{name or player_id} 失敗（第 {attempts + 1} 次）: {error}')
+            queue.fail(player_id, owner, attempts, error)
+        processed += 1
+    return processed
+
+# 函數：以多個工作者執行回填，定期輸出進度
+def run_backfill(queue, max_workers=4, lease_seconds=default_lease_seconds):
+    from nba_manifest import get_manifest
+    from nba_telemetry import write_summary
+
+    # 工作者名稱包含主機與程序 ID，多台機器共用佇列時也能分辨
+    owner_prefix = f'{socket.gethostname()}:{os.getpid()}'
+    stop = threading.Event()
+
+    def report():
+        while not stop.wait(progress_interval):
+            print_progress(queue)
+
+    reporter = threading.Thread(target=report, daemon=True)
+    reporter.start()
+    print_progress(queue)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_work, queue, f'{owner_prefix}:{i}', lease_seconds, stop)
+                       for i in range(max_workers)]
+            try:
+                processed = sum(future.result() for future in futures)
+            except KeyboardInterrupt:
+                # 必須在離開 with 之前通知工作者停止，否則 shutdown 會等到佇列中的工作全部處理完
+                # 進行中的工作保留租約，到期後會被重新領取
+                print('\n已中斷，等待進行中的工作結束；未完成的工作會在租約到期後重新處理')
+                stop.set()
+                raise
+    finally:
+        stop.set()
+        get_manifest().write_changes()
+
+    print(f'\n本次處理 {processed} 個工作')
+    print_progress(queue)
+    write_summary('player_backfill')
+    return processed
+
+# 主函數
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('seed', 'run', 'status', 'retry-failed'):
+        print('用法: python nba_backfill.py seed|run|status|retry-failed [--workers=4] [--shard=0/2] [--lease=300]')
+        return
+
+    options = {}
+    for arg in sys.argv[2:]:
+        if arg.startswith('--') and '=' in arg:
+            name, value = arg[2:].split('=', 1)
+            options[name] = value
+    queue = JobQueue(shard=parse_shard(options.get('shard', '0/1')))
+
+    command = sys.argv[1]
+    if command == 'seed':
+        seed(queue)
+    elif command == 'run':
+        run_backfill(queue, max_workers=int(options.get('workers', 4)),
+                     lease_seconds=float(options.get('lease', default_lease_seconds)))
+    elif command == 'retry-failed':
+        print(f'已重新排入 {queue.retry_failed()} 個失敗的工作')
+    else:
+        print_progress(queue)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+import nba_replay
+
+# 離線效能測試：以重播伺服器提供錄製的回應，量測各爬蟲依序執行與同時執行的
+# 總耗時與每秒請求數。需要先執行 python nba_replay.py record 錄製回應。
+#
+# 用法: python nba_benchmark.py [--latency=0.1] [--throttle-rps=0] [--workers=4]
+#                               [--client-rate=50] [--serial-delay=0] [--output=benchmark_results.json]
+
+# 爬蟲寫入結果的目錄（在暫存目錄中建立）
+output_dirs = ('nba_data', 'nba_data_json', 'nba_player_data')
+
+# 函數：建立各個測試情境的工作列表（必須在設定好重播伺服器的環境變數之後呼叫）
+def build_scenarios():
+    import nba_advanced_scraper
+    import nba_scraper
+    import player_specific_scraper
+
+    pages = [(path, nba_scraper.scrape_page, (nba_scraper.base_url + path, path.replace('/', '_').strip('_')))
+             for path in nba_scraper.allowed_paths]
+    players = [(player_id, player_specific_scraper.scrape_player, (player_id,))
+               for player_id in nba_replay.default_player_ids]
+    return {
+        'advanced_scraper': nba_advanced_scraper.build_tasks(),
+        'player_scraper': players,
+        'page_scraper': pages,
+    }
+
+# 函數：執行一個情境並回傳量測結果
+def measure(tasks, mode, workers, serial_delay):
+    from nba_http import run_concurrently, run_serially
+    from nba_telemetry import get_telemetry
+
+    requests_before = get_telemetry().summary()['requests']
+    started = time.perf_counter()
+    if mode == 'serial':
+        results, _ = run_serially(tasks, delay=serial_delay)
+    else:
+        results, _ = run_concurrently(tasks, max_workers=workers)
+    elapsed = time.perf_counter() - started
+    requests = get_telemetry().summary()['requests'] - requests_before
+    return {
+        'mode': mode,
+        'tasks': len(tasks),
+        'failed': sum(1 for result in results.values() if result is None),
+        'requests': requests,
+        'elapsed_seconds': elapsed,
+        'requests_per_second': requests / elapsed if elapsed > 0 else 0.0,
+    }
+
+# 函數：啟動重播伺服器並執行所有情境
+def run_benchmark(latency=0.1, jitter=0.0, throttle_rps=0, workers=4, client_rate=50.0, serial_delay=0.0,
+                  fixtures=None):
+    fixtures = os.path.abspath(fixtures or nba_replay.fixtures_dir)
+    server = nba_replay.start_server(fixtures, latency=latency, jitter=jitter, throttle_rps=throttle_rps)
+    nba_replay.use_server(server)
+    print(f'重播伺服器: {server.base}（{len(server.store.index)} 個錄製回應，延遲 {latency} 秒）')
+
+    # 在暫存目錄中執行，避免覆寫真正的爬取結果
+    original_dir = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix='nba_benchmark_')
+    os.chdir(workdir)
+    for directory in output_dirs:
+        os.makedirs(directory, exist_ok=True)
+    try:
+        from nba_http import configure_cache, configure_rate_limit
+
+        # 所有請求都送到同一個本地主機，不使用快取，才能量測實際的請求
+        configure_cache(enabled=False)
+        configure_rate_limit('127.0.0.1', client_rate, max(1, int(client_rate)))
+
+        results = {}
+        for name, tasks in build_scenarios().items():
+            results[name] = {}
+            for mode in ('serial', 'concurrent'):
+                print(f'\n=== {name} ({mode}) ===')
+                results[name][mode] = measure(tasks, mode, workers, serial_delay)
+    finally:
+        os.chdir(original_dir)
+        server.shutdown()
+        server.server_close()
+
+    return {
+        'settings': {'latency': latency, 'jitter': jitter, 'throttle_rps': throttle_rps, 'workers': workers,
+                     'client_rate': client_rate, 'serial_delay': serial_delay},
+        'server_statuses': {str(status): count for status, count in sorted(server.statuses.items())},
+        'scenarios': results,
+    }
+
+# 函數：輸出比較表
+def print_report(report):
+    print(f"\n{'情境':<18}{'模式':<12}{'工作':>6}{'失敗':>6}{'請求':>6}{'耗時(秒)':>10}{'請求/秒':>10}")
+    for name, modes in report['scenarios'].items():
+        for mode, result in modes.items():
+            print(f"{name:<18}{mode:<12}{result['tasks']:>6}{result['failed']:>6}{result['requests']:>6}"
+                  f"{result['elapsed_seconds']:>10.2f}{result['requests_per_second']:>10.1f}")
+        serial = modes['serial']['elapsed_seconds']
+        concurrent = modes['concurrent']['elapsed_seconds']
+        if concurrent > 0:
+            print(f'{"":<18}加速 {serial / concurrent:.1f} 倍')
+    print(f"重播伺服器回應狀態: {report['server_statuses']}")
+
+# 主函數
+def main():
+    options = {}
+    for arg in sys.argv[1:]:
+        if arg.startswith('--') and '=' in arg:
+            name, value = arg[2:].split('=', 1)
+            options[name.replace('-', '_')] = value
+
+    output = options.pop('output', 'benchmark_results.json')
+    fixtures = options.pop('dir', None)
+    if not os.path.exists(os.path.join(fixtures or nba_replay.fixtures_dir, 'index.json')):
+        print('找不到錄製的回應，請先執行: python nba_replay.py record')
+        return
+
+    report = run_benchmark(
+        latency=float(options.get('latency', 0.1)),
+        jitter=float(options.get('jitter', 0)),
+        throttle_rps=int(options.get('throttle_rps', 0)),
+        workers=int(options.get('workers', 4)),
+        client_rate=float(options.get('client_rate', 50)),
+        serial_delay=float(options.get('serial_delay', 0)),
+        fixtures=fixtures,
+    )
+    print_report(report)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+    print(f'結果已儲存到 {output}')
+
+if __name__ == '__main__':
+    main()
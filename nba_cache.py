@@ -0,0 +1,189 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+# 快取資料存放目錄
+cache_dir = 'nba_cache'
+
+# 快取總大小上限（位元組），超過時依最近最少使用 (LRU) 的順序移除
+max_cache_bytes = 200 * 1024 * 1024
+
+# 每個端點的快取有效時間（秒）；過期後會以 If-None-Match / If-Modified-Since 重新驗證
+endpoint_ttls = {
+    'drafthistory': 7 * 24 * 3600,     # 選秀歷史很少變動
+    'commonallplayers': 24 * 3600,     # 球員名單
+    'leaguestandings': 6 * 3600,       # 排名每天都會變動
+    'teaminfocommon': 12 * 3600,
+    'playercareerstats': 12 * 3600,
+}
+
+# 未列出端點的預設有效時間
+default_ttl = 3600
+
+# 函數：取得網址對應的有效時間
+def ttl_for(url):
+    path = urlparse(url).path.rstrip('/')
+    endpoint = path.rsplit('/', 1)[-1].lower()
+    return endpoint_ttls.get(endpoint, default_ttl)
+
+# 函數：產生快取鍵（網址加上排序後的參數）
+def cache_key(url, params=None):
+    import requests
+    full_url = requests.Request('GET', url, params=params).prepare().url
+    return hashlib.sha256(full_url.encode('utf-8')).hexdigest(), full_url
+
+# 磁碟上的 HTTP 回應快取
+class ResponseCache:
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or cache_dir
+        self.max_bytes = max_bytes or max_cache_bytes
+        self.lock = threading.Lock()
+        self.db = None
+
+    def _connect(self):
+        if self.db is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.db = sqlite3.connect(os.path.join(self.directory, 'index.sqlite'), check_same_thread=False)
+            self.db.execute('''CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                size INTEGER,
+                fetched_at REAL,
+                accessed_at REAL
+            )''')
+            self.db.commit()
+        return self.db
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, f'{key}.bin')
+
+    def lookup(self, key):
+        """取得快取項目（不存在時回傳 None）"""
+        with self.lock:
+            db = self._connect()
+            row = db.execute(
+                'SELECT url, etag, last_modified, content_type, size, fetched_at FROM entries WHERE key = ?',
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            body_path = self._body_path(key)
+            if not os.path.exists(body_path):
+                db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                db.commit()
+                return None
+            db.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            db.commit()
+        url, etag, last_modified, content_type, size, fetched_at = row
+        return {
+            'key': key,
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_type': content_type,
+            'size': size,
+            'fetched_at': fetched_at,
+        }
+
+    def is_fresh(self, entry):
+        return time.time() - entry['fetched_at'] < ttl_for(entry['url'])
+
+    def read_body(self, entry):
+        """讀取快取內容；項目在查詢之後已被其他執行緒淘汰時刪除索引並回傳 None"""
+        with self.lock:
+            try:
+                with open(self._body_path(entry['key']), 'rb') as f:
+                    return f.read()
+            except OSError:
+                db = self._connect()
+                db.execute('DELETE FROM entries WHERE key = ?', (entry['key'],))
+                db.commit()
+                return None
+
+    def store(self, key, url, response):
+        """儲存成功的回應，並在超過大小上限時淘汰舊項目"""
+        body = response.content
+        now = time.time()
+        with self.lock:
+            db = self._connect()
+            tmp_path = self._body_path(key) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, self._body_path(key))
+            db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                 response.headers.get('Content-Type'), len(body), now, now)
+            )
+            db.commit()
+            self._evict(db)
+
+    def touch(self, key):
+        """回應為 304 時更新抓取時間，讓項目重新計算有效期"""
+        now = time.time()
+        with self.lock:
+            db = self._connect()
+            db.execute('UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE key = ?', (now, now, key))
+            db.commit()
+
+    def _evict(self, db):
+        total = db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute('SELECT key, size FROM entries ORDER BY accessed_at ASC').fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+            db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            total -= size
+        db.commit()
+
+    def clear(self):
+        with self.lock:
+            db = self._connect()
+            for (key,) in db.execute('SELECT key FROM entries').fetchall():
+                try:
+                    os.remove(self._body_path(key))
+                except OSError:
+                    pass
+            db.execute('DELETE FROM entries')
+            db.commit()
+
+# 函數：把快取項目組成 requests 的回應物件
+def build_response(entry, body):
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response.url = entry['url']
+    response.headers = CaseInsensitiveDict()
+    if entry['content_type']:
+        response.headers['Content-Type'] = entry['content_type']
+    if entry['etag']:
+        response.headers['ETag'] = entry['etag']
+    if entry['last_modified']:
+        response.headers['Last-Modified'] = entry['last_modified']
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.from_cache = True
+    return response
+
+# 函數：依快取項目產生條件式請求標頭
+def conditional_headers(entry):
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
@@ -0,0 +1,189 @@
+import os
+import threading
+
+# 圖表輸出設定：
+#   draft    草稿，低解析度 PNG，最快
+#   preview  預覽，中等解析度 PNG
+#   print    印刷品質 300 DPI PNG（原本的輸出）
+#   svg      向量圖，不受解析度影響
+# 可以用環境變數 NBA_CHART_PROFILE 或各分析程式的 --profile= 選擇
+render_profiles = {
+    'draft': {'format': 'png', 'dpi': 72},
+    'preview': {'format': 'png', 'dpi': 120},
+    'print': {'format': 'png', 'dpi': 300},
+    'svg': {'format': 'svg', 'dpi': 72},
+}
+
+default_profile = os.environ.get('NBA_CHART_PROFILE', 'print')
+
+# 是否繪製圖表：--no-charts 或環境變數 NBA_NO_CHARTS=1 時只輸出表格與報告，
+# 不繪製任何圖表，也完全不匯入 matplotlib
+draw_charts = os.environ.get('NBA_NO_CHARTS', '') in ('', '0')
+
+# 同時繪製圖表的程序數（1 表示在主程序中依序繪製）
+chart_workers = int(os.environ.get('NBA_CHART_WORKERS', os.cpu_count() or 1))
+
+# 函數：取得 matplotlib.pyplot（第一次繪圖時才匯入 matplotlib）
+# 不使用互動式視窗，圖表只輸出到檔案（必須在匯入 pyplot 之前設定後端）
+def pyplot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+# 函數：設定預設的輸出設定
+def set_profile(name):
+    global default_profile
+    if name not in render_profiles:
+        raise ValueError(f'未知的圖表輸出設定: {name}（可用: {", ".join(render_profiles)}）')
+    default_profile = name
+
+# 函數：開啟或關閉圖表繪製
+def set_charts_enabled(enabled):
+    global draw_charts
+    draw_charts = enabled
+
+# 函數：是否繪製圖表
+def charts_enabled():
+    return draw_charts
+
+# 函數：處理命令列中的圖表選項（--profile=、--no-charts），回傳其餘的參數
+def chart_options(argv):
+    args = []
+    for arg in argv:
+        if arg.startswith('--profile='):
+            set_profile(arg.split('=', 1)[1])
+        elif arg == '--no-charts':
+            set_charts_enabled(False)
+        else:
+            args.append(arg)
+    return args
+
+# 函數：取得輸出設定對應的副檔名（例如 .png）
+def chart_extension(profile=None):
+    return '.' + render_profiles[profile or default_profile]['format']
+
+# 圖表範本：圖表、座標軸、標籤、格線與圖例只在 build 中建立一次，
+# 之後每張圖表只在 update 中更新線條、長條與文字的資料，不需要重新建立整個圖表
+class ChartTemplate:
+    figsize = (12, 6)
+    polar = False
+
+    def __init__(self):
+        # tight 版面在每次輸出時重新計算，標題或刻度標籤改變後仍然不會被裁切
+        self.fig = pyplot().figure(figsize=self.figsize, layout='tight')
+        self.ax = self.fig.add_subplot(projection='polar' if self.polar else None)
+        self.build(self.ax)
+
+    def build(self, ax):
+        raise NotImplementedError
+
+    def update(self, *args):
+        raise NotImplementedError
+
+# 函數：把類別（例如賽季）設定為 X 軸刻度，回傳每個類別的位置
+# 重複的類別（例如季中被交易的球員同一賽季有多列）只建立一個刻度，保留第一次出現的順序
+def set_category_ticks(ax, categories):
+    categories = list(dict.fromkeys(categories))
+    ax.set_xticks(range(len(categories)), categories)
+    return {category: position for position, category in enumerate(categories)}
+
+# 函數：資料更新後重新計算座標軸範圍
+def rescale(ax):
+    ax.relim()
+    ax.autoscale_view()
+
+# 圖表引擎：管理圖表的生命週期
+#   - 圖表範本 (ChartTemplate 子類別) 每個程序只建立一次，之後重複使用，只更新資料
+#   - 一般的繪圖函數建立的圖表在輸出後立即關閉
+# 不論繪製多少張圖表，開啟的圖表數量與記憶體用量都維持固定
+class ChartEngine:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.templates = {}
+
+    def render(self, path_base, plot, args, profile=None, style=None):
+        """繪製並儲存一張圖表，回傳檔案路徑；plot 為圖表範本類別或回傳 Figure 的繪圖函數"""
+        settings = render_profiles[profile or default_profile]
+        path = path_base + chart_extension(profile)
+        plt = pyplot()
+        with self.lock:
+            if style:
+                plt.rcParams.update(style)
+            if isinstance(plot, type) and issubclass(plot, ChartTemplate):
+                template = self.templates.get(plot)
+                if template is None:
+                    template = self.templates[plot] = plot()
+                template.update(*args)
+                template.fig.savefig(path, dpi=settings['dpi'], format=settings['format'])
+                return path
+            fig = plot(*args)
+            try:
+                fig.savefig(path, dpi=settings['dpi'], format=settings['format'])
+            finally:
+                plt.close(fig)
+            return path
+
+    def close(self):
+        """關閉所有圖表範本"""
+        with self.lock:
+            for template in self.templates.values():
+                pyplot().close(template.fig)
+            self.templates.clear()
+
+_engine = None
+_engine_lock = threading.Lock()
+
+# 函數：取得目前程序共用的圖表引擎（繪圖程序池中的每個程序各有一個）
+def get_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ChartEngine()
+        return _engine
+
+# 函數：在目前的程序中繪製並儲存一張圖表，回傳檔案路徑
+# plot 為圖表範本類別，或 plot(*args) 建立圖表並回傳 Figure 的函數；style 為繪製前套用的 rcParams（例如字體）
+def render_chart(path_base, plot, args, profile=None, style=None):
+    return get_engine().render(path_base, plot, args, profile, style)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# 函數：取得共用的繪圖程序池（第一次使用時建立，之後的圖表沿用同一批程序）
+def get_pool():
+    global _pool
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=chart_workers)
+        return _pool
+
+# 函數：繪製一組互不相關的圖表，charts 為 (路徑（不含副檔名）, 圖表範本或繪圖函數, 參數) 的列表
+# 有多張圖表且 chart_workers > 1 時分散到多個程序同時繪製；回傳 {路徑: 檔案路徑}，失敗的圖表為 None
+# 關閉圖表繪製時不繪製任何圖表，回傳空的 dict
+def render_charts(charts, profile=None, style=None):
+    profile = profile or default_profile
+    results = {}
+    if not draw_charts:
+        return results
+    if chart_workers <= 1 or len(charts) <= 1:
+        for path_base, plot, args in charts:
+            try:
+                results[path_base] = render_chart(path_base, plot, args, profile, style)
+            except Exception as e:
+                print(f'繪製圖表 {path_base} 時發生錯誤: {e}')
+                results[path_base] = None
+        return results
+
+    pool = get_pool()
+    futures = {path_base: pool.submit(render_chart, path_base, plot, args, profile, style)
+               for path_base, plot, args in charts}
+    for path_base, future in futures.items():
+        try:
+            results[path_base] = future.result()
+        except Exception as e:
+            print(f'繪製圖表 {path_base} 時發生錯誤: {e}')
+            results[path_base] = None
+    return results
@@ -1,44 +1,150 @@
-import json
 import os
-import matplotlib.pyplot as plt
-import pandas as pd
-import numpy as np
-import matplotlib
-
-# 設置中文字體
-try:
-    # 嘗試設置為系統中可用的中文字體
-    matplotlib.rcParams['font.family'] = ['Arial Unicode MS', 'Microsoft YaHei', 'SimHei', 'sans-serif']
-    # 解決負號顯示問題
-    matplotlib.rcParams['axes.unicode_minus'] = False
-    print('已設置中文字體支援')
-except:
-    print('警告：無法設置中文字體，圖表中的中文可能無法正確顯示')
-
-# 確保我們有儲存分析結果的目錄
-if not os.path.exists('nba_analysis'):
-    os.makedirs('nba_analysis')
-
-# 導入數據函數
-def load_data(file_path):
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f'無法讀取檔案 {file_path}: {e}')
+import sys
+import time
+
+from nba_charts import chart_options, charts_enabled, pyplot, render_charts
+from nba_http import run_concurrently
+from nba_storage import load_table
+
+# pandas 與 matplotlib 在分析與繪圖時才匯入，匯入這個模組不會建立目錄或修改 matplotlib 設定
+
+# 分析結果的目錄（寫入時才建立）
+analysis_dir = 'nba_analysis'
+
+# 圖表字體：嘗試設置為系統中可用的中文字體，並解決負號顯示問題
+# 繪圖時由圖表引擎套用（包含繪圖程序池中的每個程序）
+chart_style = {
+    'font.family': ['Arial Unicode MS', 'Microsoft YaHei', 'SimHei', 'sans-serif'],
+    'axes.unicode_minus': False,
+}
+
+# 函數：取得分析結果的路徑（會建立目錄）
+def analysis_output(name):
+    os.makedirs(analysis_dir, exist_ok=True)
+    return os.path.join(analysis_dir, name)
+
+# 導入數據函數（依實際存在的格式讀取 Feather/Parquet/JSON，回傳 DataFrame）
+def load_data(path_base):
+    return load_table(path_base)
+
+# 繪製勝率最高的5支球隊
+def plot_top_teams(top_teams):
+    plt = pyplot()
+    fig = plt.figure(figsize=(10, 6))
+    plt.bar(top_teams['TEAM'], top_teams['WIN_PCT'], color='blue')
+    plt.title('勝率最高的5支球隊')
+    plt.xlabel('球隊')
+    plt.ylabel('勝率')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    return fig
+
+# 繪製每支球隊的球員數量
+def plot_team_player_counts(team_counts_sorted):
+    plt = pyplot()
+    fig = plt.figure(figsize=(12, 8))
+    plt.bar(team_counts_sorted['TEAM_NAME'], team_counts_sorted['PLAYER_COUNT'], color='green')
+    plt.title('每支球隊的球員數量')
+    plt.xlabel('球隊')
+    plt.ylabel('球員數量')
+    plt.xticks(rotation=90)
+    plt.tight_layout()
+    return fig
+
+# 繪製球員數量最多的10個國家
+def plot_country_distribution(top_countries):
+    plt = pyplot()
+    fig = plt.figure(figsize=(10, 6))
+    plt.bar(top_countries['COUNTRY'], top_countries['PLAYER_COUNT'], color='orange')
+    plt.title('球員數量最多的10個國家')
+    plt.xlabel('國家')
+    plt.ylabel('球員數量')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    return fig
+
+# 繪製最近20年每年選秀人數
+def plot_draft_trend(recent_years):
+    plt = pyplot()
+    fig = plt.figure(figsize=(12, 6))
+    plt.plot(recent_years['SEASON'], recent_years['DRAFT_COUNT'], marker='o', linestyle='-')
+    plt.title('最近20年每年選秀人數')
+    plt.xlabel('年度')
+    plt.ylabel('選秀人數')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    return fig
+
+# 繪製選秀人數最多的十大學校
+def plot_top_colleges(top_colleges):
+    plt = pyplot()
+    fig = plt.figure(figsize=(15, 7))
+    bars = plt.bar(top_colleges['ORGANIZATION'], top_colleges['DRAFT_COUNT'], color='purple')
+    plt.title('選秀人數最多的十大學校', fontsize=16)
+    plt.xlabel('學校/組織', fontsize=14)
+    plt.ylabel('選秀人數', fontsize=14)
+    plt.xticks(rotation=45, fontsize=12)
+    plt.yticks(fontsize=12)
+    
+    # 在每個長條上顯示數值
+    for bar in bars:
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2., height + 1,
+                f'{int(height)}',
+                ha='center', va='bottom', fontsize=12)
+    
+    plt.tight_layout()
+    return fig
+
+# 分析的輸入：名稱 -> (路徑, 欄位型別)
+# 每個輸入只載入一次並轉換為有型別的 DataFrame，使用同一個輸入的分析共用；
+# 數值欄位轉為數字，用來分組的文字欄位轉為 category（分組時只比較整數代碼）
+analysis_inputs = {
+    'standings': ('nba_data_json/standings',
+                  {'WINS': 'number', 'LOSSES': 'number', 'WIN_PCT': 'number', 'CONFERENCE': 'category'}),
+    'players': ('nba_data_json/players', {'TEAM_NAME': 'category', 'COUNTRY': 'category'}),
+    'draft_history': ('nba_data_json/draft_history', {'SEASON': 'category', 'ORGANIZATION': 'category'}),
+}
+
+# 同時執行分析的程序數（最多與分析項目數相同；1 表示在主程序中依序執行）
+analysis_workers = int(os.environ.get('NBA_ANALYSIS_WORKERS', os.cpu_count() or 1))
+
+# 函數：載入一個輸入並轉換欄位型別，沒有資料時回傳 None
+def load_frame(name):
+    import pandas as pd
+
+    path_base, types = analysis_inputs[name]
+    data = load_data(path_base)
+    if data is None or data.empty:
         return None
+    df = pd.DataFrame(data)
+    for column, kind in types.items():
+        if column not in df.columns:
+            continue
+        if kind == 'number':
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+        else:
+            df[column] = df[column].astype(kind)
+    return df
+
+# 函數：以一次 groupby 計算多個欄位各自的數量，回傳 {欄位: DataFrame(欄位, name)}
+# 先依所有欄位的組合計數，再由組合加總出每個欄位的數量，同一個 DataFrame 只需要分組一次
+def count_by(df, columns, name):
+    columns = [column for column in columns if column in df.columns]
+    if not columns:
+        return {}
+    # 保留缺值的組合，某個欄位是缺值的列仍然計入其他欄位的數量
+    combined = df.groupby(columns, observed=True, dropna=False).size()
+    return {column: combined.groupby(level=column, observed=True).sum().reset_index(name=name)
+            for column in columns}
 
-# 分析球隊排名
-def analyze_standings():
-    file_path = 'nba_data_json/standings.json'
-    standings = load_data(file_path)
+# 分析球隊排名，回傳要繪製的圖表
+def analyze_standings(df):
+    charts = []
     
-    if not standings:
+    if df is None:
         print('無法分析球隊排名資料')
-        return
-    
-    # 轉換為 DataFrame
-    df = pd.DataFrame(standings)
+        return charts
     
     # 選擇感興趣的欄位
     try:
@@ -49,123 +155,88 @@ def analyze_standings():
         sorted_df = selected_df.sort_values('WIN_PCT', ascending=False)
         
         # 儲存分析結果
-        sorted_df.to_csv('nba_analysis/team_standings_analysis.csv', index=False)
+        sorted_df.to_csv(analysis_output('team_standings_analysis.csv'), index=False)
         print('成功儲存球隊排名分析')
         
         # 創建視覺化：勝率最高的5支球隊
-        plt.figure(figsize=(10, 6))
-        top_teams = sorted_df.head(5)
-        plt.bar(top_teams['TEAM'], top_teams['WIN_PCT'], color='blue')
-        plt.title('勝率最高的5支球隊')
-        plt.xlabel('球隊')
-        plt.ylabel('勝率')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('nba_analysis/top_teams_win_pct.png', dpi=300)
-        print('成功創建勝率最高的5支球隊圖表')
+        charts.append((analysis_output('top_teams_win_pct'), plot_top_teams, (sorted_df.head(5),)))
         
         # 按東西部分析
         if 'CONFERENCE' in df.columns:
-            conference_wins = df.groupby('CONFERENCE')['WINS'].mean().reset_index()
-            print('\n東西部競爭差異:')
-            print(conference_wins)
+            conference_wins = df.groupby('CONFERENCE', observed=True)['WINS'].mean().reset_index()
+            print(f'\n東西部競爭差異:\n{conference_wins}')
     except Exception as e:
         print(f'分析球隊排名時發生錯誤: {e}')
+    return charts
 
-# 分析球員數據
-def analyze_players():
-    file_path = 'nba_data_json/players.json'
-    players = load_data(file_path)
+# 分析球員數據，回傳要繪製的圖表
+def analyze_players(df):
+    charts = []
     
-    if not players:
+    if df is None:
         print('無法分析球員資料')
-        return
-    
-    # 轉換為 DataFrame
-    df = pd.DataFrame(players)
+        return charts
     
     try:
+        # 球隊與國家的球員數量由同一次 groupby 計算
+        group_columns = ['COUNTRY']
+        if 'TEAM_ID' in df.columns:
+            group_columns.insert(0, 'TEAM_NAME')
+        counts = count_by(df, group_columns, 'PLAYER_COUNT')
+        
         # 按球隊分析球員數量
-        if 'TEAM_ID' in df.columns and 'TEAM_NAME' in df.columns:
-            team_counts = df.groupby('TEAM_NAME').size().reset_index(name='PLAYER_COUNT')
-            team_counts_sorted = team_counts.sort_values('PLAYER_COUNT', ascending=False)
+        if 'TEAM_NAME' in counts:
+            team_counts_sorted = counts['TEAM_NAME'].sort_values('PLAYER_COUNT', ascending=False)
             
             # 儲存分析結果
-            team_counts_sorted.to_csv('nba_analysis/team_player_counts.csv', index=False)
+            team_counts_sorted.to_csv(analysis_output('team_player_counts.csv'), index=False)
             print('成功儲存球隊球員數量分析')
             
             # 創建視覺化
-            plt.figure(figsize=(12, 8))
-            plt.bar(team_counts_sorted['TEAM_NAME'], team_counts_sorted['PLAYER_COUNT'], color='green')
-            plt.title('每支球隊的球員數量')
-            plt.xlabel('球隊')
-            plt.ylabel('球員數量')
-            plt.xticks(rotation=90)
-            plt.tight_layout()
-            plt.savefig('nba_analysis/team_player_counts.png', dpi=300)
-            print('成功創建球隊球員數量圖表')
+            charts.append((analysis_output('team_player_counts'), plot_team_player_counts, (team_counts_sorted,)))
         
         # 分析國家分佈
-        if 'COUNTRY' in df.columns:
-            country_counts = df.groupby('COUNTRY').size().reset_index(name='PLAYER_COUNT')
-            country_counts_sorted = country_counts.sort_values('PLAYER_COUNT', ascending=False)
+        if 'COUNTRY' in counts:
+            country_counts_sorted = counts['COUNTRY'].sort_values('PLAYER_COUNT', ascending=False)
             
             # 儲存分析結果
-            country_counts_sorted.to_csv('nba_analysis/player_country_analysis.csv', index=False)
+            country_counts_sorted.to_csv(analysis_output('player_country_analysis.csv'), index=False)
             print('成功儲存球員國家分佈分析')
             
             # 只顯示前10個國家
             top_countries = country_counts_sorted.head(10)
-            plt.figure(figsize=(10, 6))
-            plt.bar(top_countries['COUNTRY'], top_countries['PLAYER_COUNT'], color='orange')
-            plt.title('球員數量最多的10個國家')
-            plt.xlabel('國家')
-            plt.ylabel('球員數量')
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            plt.savefig('nba_analysis/player_country_distribution.png', dpi=300)
-            print('成功創建球員國家分佈圖表')
+            charts.append((analysis_output('player_country_distribution'), plot_country_distribution, (top_countries,)))
     except Exception as e:
         print(f'分析球員數據時發生錯誤: {e}')
+    return charts
 
-# 分析選秀歷史
-def analyze_draft_history():
-    file_path = 'nba_data_json/draft_history.json'
-    draft_history = load_data(file_path)
+# 分析選秀歷史，回傳要繪製的圖表
+def analyze_draft_history(df):
+    charts = []
     
-    if not draft_history:
+    if df is None:
         print('無法分析選秀歷史資料')
-        return
-    
-    # 轉換為 DataFrame
-    df = pd.DataFrame(draft_history)
+        return charts
     
     try:
+        # 各年與各大學的選秀人數由同一次 groupby 計算
+        counts = count_by(df, ['SEASON', 'ORGANIZATION'], 'DRAFT_COUNT')
+        
         # 分析各年選秀人數
-        if 'SEASON' in df.columns:
-            draft_counts = df.groupby('SEASON').size().reset_index(name='DRAFT_COUNT')
-            draft_counts_sorted = draft_counts.sort_values('SEASON', ascending=True)
+        if 'SEASON' in counts:
+            draft_counts_sorted = counts['SEASON'].sort_values('SEASON', ascending=True)
             
             # 儲存分析結果
-            draft_counts_sorted.to_csv('nba_analysis/draft_counts_by_year.csv', index=False)
+            draft_counts_sorted.to_csv(analysis_output('draft_counts_by_year.csv'), index=False)
             print('成功儲存各年選秀人數分析')
             
             # 創建視覺化（顯示最近20年）
             recent_years = draft_counts_sorted.tail(20)
-            plt.figure(figsize=(12, 6))
-            plt.plot(recent_years['SEASON'], recent_years['DRAFT_COUNT'], marker='o', linestyle='-')
-            plt.title('最近20年每年選秀人數')
-            plt.xlabel('年度')
-            plt.ylabel('選秀人數')
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            plt.savefig('nba_analysis/draft_count_trend.png', dpi=300)
-            print('成功創建選秀人數趨勢圖')
+            charts.append((analysis_output('draft_count_trend'), plot_draft_trend, (recent_years,)))
         
         # 分析各大學選秀人數
-        if 'ORGANIZATION' in df.columns:
-            college_counts = df.groupby('ORGANIZATION').size().reset_index(name='DRAFT_COUNT')
-            college_counts_sorted = college_counts.sort_values('DRAFT_COUNT', ascending=False)
+        if 'ORGANIZATION' in counts:
+            college_counts_sorted = counts['ORGANIZATION'].sort_values('DRAFT_COUNT', ascending=False)
             
             # 只保留十大學校及簡化圖表（排除空值）
             top_colleges = college_counts_sorted[
@@ -174,30 +245,87 @@ def analyze_draft_history():
             ].head(10)
             
             # 儲存分析結果
-            top_colleges.to_csv('nba_analysis/top_draft_colleges.csv', index=False)
+            top_colleges.to_csv(analysis_output('top_draft_colleges.csv'), index=False)
             print('成功儲存選秀人數最多的十大學校分析')
             
             # 創建視覺化
-            plt.figure(figsize=(15, 7))
-            bars = plt.bar(top_colleges['ORGANIZATION'], top_colleges['DRAFT_COUNT'], color='purple')
-            plt.title('選秀人數最多的十大學校', fontsize=16)
-            plt.xlabel('學校/組織', fontsize=14)
-            plt.ylabel('選秀人數', fontsize=14)
-            plt.xticks(rotation=45, fontsize=12)
-            plt.yticks(fontsize=12)
-            
-            # 在每個長條上顯示數值
-            for bar in bars:
-                height = bar.get_height()
-                plt.text(bar.get_x() + bar.get_width()/2., height + 1,
-                        f'{int(height)}',
-                        ha='center', va='bottom', fontsize=12)
-            
-            plt.tight_layout()
-            plt.savefig('nba_analysis/top_draft_colleges.png', dpi=300)
-            print('成功創建選秀學校分析圖')
+            charts.append((analysis_output('top_draft_colleges'), plot_top_colleges, (top_colleges,)))
     except Exception as e:
         print(f'分析選秀歷史時發生錯誤: {e}')
+    return charts
+
+# 分析項目：(名稱, 輸入, 分析函數)，互不相關，可以同時執行
+analyses = [
+    ('球隊排名', 'standings', analyze_standings),
+    ('球員', 'players', analyze_players),
+    ('選秀歷史', 'draft_history', analyze_draft_history),
+]
+
+# 函數：執行一項分析並回傳 (要繪製的圖表, 耗時)（在分析程序中執行）
+def _timed_analysis(func, df):
+    started = time.perf_counter()
+    charts = func(df)
+    return charts, time.perf_counter() - started
+
+# 函數：執行所有分析，回傳 ({名稱: 圖表}, {名稱: 耗時})
+# pandas 的分組與排序大多在持有 GIL 的情況下執行，執行緒無法同時利用多個核心，
+# 因此分散到多個程序；資料表與圖表參數都可以序列化傳遞
+def run_analyses(frames, max_workers):
+    workers = min(max_workers, len(analyses))
+    results, timings = {}, {}
+    if workers <= 1:
+        for name, input_name, func in analyses:
+            results[name], timings[name] = _timed_analysis(func, frames.get(input_name))
+        return results, timings
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {name: executor.submit(_timed_analysis, func, frames.get(input_name))
+                   for name, input_name, func in analyses}
+        for name, future in futures.items():
+            try:
+                results[name], timings[name] = future.result()
+            except Exception as e:
+                print(f'分析{name}時發生錯誤: {e}')
+                results[name], timings[name] = [], 0.0
+    return results, timings
+
+# 函數：執行分析流程（載入輸入 -> 同時執行分析 -> 繪製圖表），回傳各階段的耗時
+def run_pipeline(max_workers=None):
+    max_workers = max_workers or analysis_workers
+    stage_timings = {}
+
+    # 每個輸入只載入一次，多個輸入以執行緒同時載入（主要是讀檔）
+    started = time.perf_counter()
+    frames, load_timings = run_concurrently([(name, load_frame, (name,)) for name in analysis_inputs],
+                                            max_workers=min(max_workers, len(analysis_inputs)))
+    stage_timings['載入資料'] = time.perf_counter() - started
+    for name, seconds in load_timings.items():
+        stage_timings[f'  載入 {name}'] = seconds
+
+    # 互不相關的分析在多個程序中同時執行
+    print(f'\n同時執行 {len(analyses)} 項分析...')
+    started = time.perf_counter()
+    results, analysis_timings = run_analyses(frames, max_workers)
+    stage_timings['分析'] = time.perf_counter() - started
+    for name, _, _ in analyses:
+        stage_timings[f'  分析{name}'] = analysis_timings.get(name, 0.0)
+
+    # 繪製圖表（--no-charts 時只輸出表格與報告）
+    charts = [chart for name, _, _ in analyses for chart in results.get(name) or []]
+    if charts_enabled():
+        print(f'\n繪製 {len(charts)} 張圖表...')
+        started = time.perf_counter()
+        render_analysis_charts(charts)
+        stage_timings['繪製圖表'] = time.perf_counter() - started
+    return stage_timings
+
+# 繪製所有圖表（互不相關的圖表分散到多個程序同時繪製）
+def render_analysis_charts(charts):
+    for path_base, path in render_charts(charts, style=chart_style).items():
+        if path:
+            print(f'成功創建圖表: {path}')
 
 # 寫入分析報告
 def write_summary_report():
@@ -222,12 +350,18 @@ def write_summary_report():
 結論：NBA 的數據顯示了它全球性的影響力和高度競爭的特性。這些分析提供了對聯盟發展趨勢的洞察，並可能有助於預測未來的發展方向。
 '''
     
-    with open('nba_analysis/summary_report.txt', 'w', encoding='utf-8') as f:
+    with open(analysis_output('summary_report.txt'), 'w', encoding='utf-8') as f:
         f.write(report)
     print('成功創建分析報告')
 
 # 主函數
+# 用法: python nba_data_analyzer.py [--profile=draft|preview|print|svg] [--no-charts] [--workers=4]
 def main():
+    args = chart_options(sys.argv[1:])
+    max_workers = None
+    for arg in args:
+        if arg.startswith('--workers='):
+            max_workers = int(arg.split('=', 1)[1])
     print('開始分析 NBA 數據...')
     
     # 確保資料目錄存在
@@ -235,23 +369,25 @@ def main():
         print('錯誤：沒有找到數據目錄。請先執行爬蟲程式。')
         return
     
-    # 分析競爭陣容
-    print('\n分析球隊排名資料...')
-    analyze_standings()
-    
-    # 分析球員數據
-    print('\n分析球員資料...')
-    analyze_players()
-    
-    # 分析選秀歷史
-    print('\n分析選秀歷史...')
-    analyze_draft_history()
+    started = time.perf_counter()
+    stage_timings = run_pipeline(max_workers)
     
     # 創建報告
     print('\n創建分析報告...')
+    report_started = time.perf_counter()
     write_summary_report()
+    stage_timings['創建報告'] = time.perf_counter() - report_started
+    
+    # 各階段耗時（分析同時執行，各項分析耗時的總和可能大於分析階段的耗時）
+    print(f'\n總耗時: {time.perf_counter() - started:.2f} 秒')
+    for name, seconds in stage_timings.items():
+        print(f'  {name}: {seconds:.2f} 秒')
     
     print('\n所有分析完成！結果已儲存在 nba_analysis 目錄中。')
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    # 封裝成單一執行檔 (PyInstaller --onefile) 時，繪圖程序池的每個程序會重新啟動這個執行檔，
+    # freeze_support 讓這些程序只執行繪圖工作，不會重新執行主程式
+    from multiprocessing import freeze_support
+    freeze_support()
+    main()
@@ -0,0 +1,51 @@
+import codecs
+import importlib.util
+from html.parser import HTMLParser
+
+# BeautifulSoup 只在需要時才匯入，只使用 LinkStreamParser 的程式不需要載入 bs4
+# 有安裝 lxml 時使用較快的 lxml 解析器，否則使用內建的 html.parser
+parser_name = 'lxml' if importlib.util.find_spec('lxml') is not None else 'html.parser'
+
+# 函數：只保留球員個人頁面連結 (a[href*="/player/"]) 的過濾器
+def player_link_strainer():
+    from bs4 import SoupStrainer
+    return SoupStrainer('a', href=lambda href: href is not None and '/player/' in href)
+
+# 函數：只保留球員頁面 PlayerSummary 區塊（姓名與基本資訊）的過濾器
+def player_summary_strainer():
+    from bs4 import SoupStrainer
+    return SoupStrainer(['h1', 'p'], class_=lambda cls: cls is not None and 'PlayerSummary_' in cls)
+
+# 函數：讀取已儲存的 HTML 檔案並解析，strainer 可限制只建立需要的節點
+def parse_file(path, strainer=None):
+    from bs4 import BeautifulSoup
+    with open(path, 'rb') as f:
+        return BeautifulSoup(f.read(), parser_name, parse_only=strainer)
+
+# 函數：判斷是否為球員個人頁面的連結
+def is_player_profile_link(href):
+    return '/player/' in href and 'profile' in href
+
+# 逐步解析 HTML 的連結解析器：可以在下載過程中一邊接收片段一邊解析，
+# 每找到一個符合條件的連結就立即呼叫 callback，不需要等整個頁面下載完成
+class LinkStreamParser(HTMLParser):
+    def __init__(self, callback, match=is_player_profile_link):
+        super().__init__(convert_charrefs=True)
+        self.callback = callback
+        self.match = match
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def feed_bytes(self, chunk):
+        """接收一段原始位元組（多位元組字元可以跨越兩個片段）"""
+        self.feed(self.decoder.decode(chunk))
+
+    def close(self):
+        self.feed(self.decoder.decode(b'', final=True))
+        super().close()
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        href = dict(attrs).get('href')
+        if href and self.match(href):
+            self.callback(href)
@@ -0,0 +1,407 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# requests 在第一次發送請求時才匯入，只匯入模組（例如查詢本地索引）不需要載入
+from nba_cache import ResponseCache, build_response, cache_key, conditional_headers
+from nba_telemetry import get_telemetry
+
+# 每個主機的速率限制設定：(每秒補充的權杖數, 權杖桶容量)
+# stats.nba.com 對頻繁請求相當敏感，預設值刻意保守
+rate_limits = {
+    'stats.nba.com': (1.0, 3),
+    'www.nba.com': (2.0, 4),
+}
+
+# 未列出的主機使用的預設限制
+default_rate_limit = (1.0, 2)
+
+# 同時執行的工作數量
+default_max_workers = 4
+
+# 連線池設定：保留連線的主機數量，以及每個主機的最大連線數
+pool_connections = 10
+pool_maxsize = 10
+
+# 請求逾時：(連線逾時, 讀取逾時) 秒
+request_timeout = (5, 30)
+
+# 重試設定：最多重試次數，以及指數退避的基準與上限秒數
+max_retries = 4
+backoff_base = 1.0
+backoff_max = 60.0
+
+# 會重試的狀態碼；其中 429/503 代表伺服器在限流，會觸發斷路器
+retry_statuses = (429, 500, 502, 503, 504)
+throttle_statuses = (429, 503)
+
+# 斷路器設定：連續被限流 breaker_threshold 次時，暫停該主機的所有請求 breaker_cooldown 秒
+# 每次被限流時速率減半（不低於原本的 min_rate_factor 倍），之後每次成功再慢慢恢復
+breaker_threshold = 3
+breaker_cooldown = 30.0
+min_rate_factor = 0.25
+recovery_factor = 1.2
+
+# 所有請求共用的預設標頭
+default_headers = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36',
+    'Accept-Language': 'zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# 只有安裝了 brotli 套件時才宣告支援 br 壓縮，否則無法解壓縮回應
+try:
+    import brotli  # noqa: F401
+    default_headers['Accept-Encoding'] = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        default_headers['Accept-Encoding'] = 'gzip, deflate, br'
+    except ImportError:
+        pass
+
+# 權杖桶速率限制器
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """取得一個權杖，必要時等待"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate):
+        """調整每秒補充的權杖數（已累積的權杖保留）"""
+        with self.lock:
+            self._refill()
+            self.rate = float(rate)
+
+# 每個主機的斷路器：被限流時降低權杖桶速率，連續被限流時暫停所有工作
+# 因為同一主機的所有工作共用同一個權杖桶，整個工作池會一起放慢，而不是各自持續重試
+class CircuitBreaker:
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.base_rate = bucket.rate
+        self.failures = 0
+        self.open_until = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """斷路器開啟時等待冷卻結束"""
+        while True:
+            with self.lock:
+                remaining = self.open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def record_throttle(self, host, retry_after=None):
+        """記錄一次限流回應，retry_after 為伺服器要求等待的秒數"""
+        with self.lock:
+            self.failures += 1
+            rate = max(self.base_rate * min_rate_factor, self.bucket.rate / 2)
+            self.bucket.set_rate(rate)
+            pause = retry_after or 0
+            if self.failures >= breaker_threshold:
+                pause = max(pause, breaker_cooldown)
+                print(f'{host} 連續被限流 {self.failures} 次，暫停 {pause:.0f} 秒，速率降為每秒 {rate:.2f} 個請求')
+            if pause:
+                self.open_until = max(self.open_until, time.monotonic() + pause)
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            if self.bucket.rate < self.base_rate:
+                self.bucket.set_rate(min(self.base_rate, self.bucket.rate * recovery_factor))
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+# 函數：設定某個主機的速率限制
+def configure_rate_limit(host, rate, capacity=None):
+    if capacity is None:
+        capacity = max(1, int(rate))
+    rate_limits[host] = (rate, capacity)
+    with _buckets_lock:
+        _buckets[host] = TokenBucket(rate, capacity)
+        _breakers.pop(host, None)
+
+# 函數：取得主機對應的權杖桶
+def get_rate_limiter(host):
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            rate, capacity = rate_limits.get(host, default_rate_limit)
+            bucket = TokenBucket(rate, capacity)
+            _buckets[host] = bucket
+        return bucket
+
+_breakers = {}
+
+# 函數：取得主機對應的斷路器
+def get_circuit_breaker(host):
+    bucket = get_rate_limiter(host)
+    with _buckets_lock:
+        breaker = _breakers.get(host)
+        if breaker is None or breaker.bucket is not bucket:
+            breaker = CircuitBreaker(bucket)
+            _breakers[host] = breaker
+        return breaker
+
+# 函數：在送出請求前等待該主機的斷路器冷卻與權杖
+def wait_for_slot(url):
+    host = urlparse(url).hostname or ''
+    get_circuit_breaker(host).wait()
+    get_rate_limiter(host).acquire()
+
+# 函數：調整逾時與重試設定
+def configure_retries(retries=None, timeout=None, base=None):
+    global max_retries, request_timeout, backoff_base
+    if retries is not None:
+        max_retries = retries
+    if timeout is not None:
+        request_timeout = timeout
+    if base is not None:
+        backoff_base = base
+
+# 函數：解析 Retry-After 標頭（秒數或 HTTP 日期），無法解析時回傳 None
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+# 函數：第 attempt 次重試前的等待秒數（指數退避，加上隨機抖動避免所有工作同時重試）
+def backoff_delay(attempt):
+    delay = min(backoff_max, backoff_base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+_session = None
+_session_lock = threading.Lock()
+
+# 是否使用磁碟回應快取
+cache_enabled = True
+_cache = ResponseCache()
+
+# 函數：建立新的共用連線 session
+def _build_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.headers.update(default_headers)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# 函數：取得所有爬蟲共用的 session（保持連線並重複使用）
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+# 函數：調整連線池大小，下次取得 session 時生效
+def configure_pool(connections=None, maxsize=None):
+    global _session, pool_connections, pool_maxsize
+    with _session_lock:
+        if connections:
+            pool_connections = connections
+        if maxsize:
+            pool_maxsize = maxsize
+        if _session is not None:
+            _session.close()
+            _session = None
+
+# 函數：開啟或關閉磁碟回應快取
+def configure_cache(enabled=True, directory=None, max_bytes=None):
+    global cache_enabled, _cache
+    cache_enabled = enabled
+    if directory or max_bytes:
+        _cache = ResponseCache(directory, max_bytes)
+
+# 函數：發送 GET 請求，連線失敗、逾時或收到可重試的狀態碼時以指數退避重試
+# 收到 429/503 時遵守 Retry-After，並通知斷路器降低該主機的速率
+# 回應會附上 retries（重試次數）與 latency（最後一次請求的耗時，不含等待權杖的時間）
+def _request(url, headers=None, params=None, **kwargs):
+    import requests
+
+    kwargs.setdefault('timeout', request_timeout)
+    host = urlparse(url).hostname or ''
+    breaker = get_circuit_breaker(host)
+    attempt = 0
+    while True:
+        wait_for_slot(url)
+        started = time.perf_counter()
+        try:
+            response = get_session().get(url, headers=headers, params=params, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= max_retries:
+                get_telemetry().record_error(url, time.perf_counter() - started, retries=attempt)
+                raise
+            delay = backoff_delay(attempt)
+            print(f'請求 {url} 失敗 ({type(e).__name__})，{delay:.1f} 秒後重試')
+        else:
+            response.retries = attempt
+            response.latency = time.perf_counter() - started
+            if response.status_code not in retry_statuses:
+                breaker.record_success()
+                return response
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if response.status_code in throttle_statuses:
+                breaker.record_throttle(host, retry_after)
+            if attempt >= max_retries:
+                return response
+            delay = max(retry_after or 0, backoff_delay(attempt))
+            print(f'請求 {url} 回應 {response.status_code}，{delay:.1f} 秒後重試')
+            response.close()
+        time.sleep(delay)
+        attempt += 1
+
+# 函數：透過共用 session 發送 GET 請求
+# 啟用快取時，未過期的回應直接由磁碟讀取；過期的回應會以條件式請求重新驗證
+def http_get(url, headers=None, params=None, use_cache=True, **kwargs):
+    telemetry = get_telemetry()
+    if not (cache_enabled and use_cache) or kwargs.get('stream'):
+        response = _request(url, headers=headers, params=params, **kwargs)
+        if not kwargs.get('stream'):
+            telemetry.record_request(url, response.status_code, response.latency, len(response.content), response.retries)
+        return response
+
+    started = time.perf_counter()
+    key, full_url = cache_key(url, params)
+    entry = _cache.lookup(key)
+    if entry and _cache.is_fresh(entry):
+        body = _cache.read_body(entry)
+        if body is not None:
+            response = build_response(entry, body)
+            telemetry.record_request(url, 200, time.perf_counter() - started, cache='hit')
+            return response
+        # 快取內容已被淘汰，視為未命中
+        entry = None
+
+    request_headers = dict(headers or {})
+    if entry:
+        request_headers.update(conditional_headers(entry))
+
+    response = _request(url, headers=request_headers, params=params, **kwargs)
+
+    if response.status_code == 304 and entry:
+        body = _cache.read_body(entry)
+        if body is not None:
+            _cache.touch(key)
+            telemetry.record_request(url, 304, response.latency, retries=response.retries, cache='revalidated')
+            return build_response(entry, body)
+        # 重新驗證期間快取內容被淘汰：不帶條件標頭重新請求完整內容
+        telemetry.record_request(url, 304, response.latency, retries=response.retries, cache='miss')
+        response = _request(url, headers=headers, params=params, **kwargs)
+    telemetry.record_request(url, response.status_code, response.latency, len(response.content), response.retries,
+                             cache='miss')
+    if response.status_code == 200:
+        _cache.store(key, full_url, response)
+    return response
+
+# 函數：把回應內容邊下載邊寫入檔案，不在記憶體中保留整個頁面
+# 回傳 (狀態碼, 寫入的位元組數)；狀態碼不是 200 時不寫入檔案
+# on_chunk 會在每個區塊寫入後被呼叫，可以在下載的同時處理內容（例如逐步解析連結）
+def http_download(url, path, headers=None, params=None, chunk_size=64 * 1024, on_chunk=None, **kwargs):
+    with _request(url, headers=headers, params=params, stream=True, **kwargs) as response:
+        if response.status_code != 200:
+            get_telemetry().record_request(url, response.status_code, response.latency, retries=response.retries)
+            return response.status_code, 0
+        started = time.perf_counter()
+        written = 0
+        tmp_path = path + '.tmp'
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                written += len(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk)
+        os.replace(tmp_path, path)
+        # 延遲包含下載整個頁面的時間
+        latency = response.latency + time.perf_counter() - started
+        get_telemetry().record_request(url, response.status_code, latency, written, response.retries)
+        return response.status_code, written
+
+# 函數：同時執行多個抓取工作
+# tasks 為 (名稱, 函數, 參數) 的列表，回傳 (結果字典, 每個工作的耗時字典)
+# 工作拋出例外或回傳 None 視為失敗，失敗的工作會放回重試佇列，最多再執行 retry_rounds 輪
+def run_concurrently(tasks, max_workers=None, retry_rounds=0):
+    max_workers = max_workers or default_max_workers
+    results = {}
+    timings = {}
+    timings_lock = threading.Lock()
+
+    def timed(name, func, args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            with timings_lock:
+                timings[name] = timings.get(name, 0) + time.perf_counter() - started
+
+    pending = list(tasks)
+    for round_number in range(retry_rounds + 1):
+        if round_number:
+            delay = backoff_delay(round_number)
+            print(f'{len(pending)} 個工作失敗，{delay:.1f} 秒後重試（第 {round_number} 輪）')
+            time.sleep(delay)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(timed, name, func, args): name for name, func, args in pending}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f'工作 {name} 執行失敗: {e}')
+                    results[name] = None
+        pending = [task for task in pending if results[task[0]] is None]
+        if not pending:
+            break
+
+    return results, timings
+
+# 函數：依序執行工作（保留原本每次請求後等待的行為，作為比較基準）
+def run_serially(tasks, delay=2):
+    results = {}
+    timings = {}
+    for name, func, args in tasks:
+        started = time.perf_counter()
+        try:
+            results[name] = func(*args)
+        except Exception as e:
+            print(f'工作 {name} 執行失敗: {e}')
+            results[name] = None
+        timings[name] = time.perf_counter() - started
+        time.sleep(delay)
+    return results, timings
@@ -0,0 +1,217 @@
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+
+# 分片目錄結構：球員資料與比較結果依 ID 前綴分散到子目錄，避免單一目錄中有數萬個檔案
+#   nba_player_data/0002/player_2544_stats
+#   nba_player_comparison/0002/2544_vs_201142_radar.png
+# 每個根目錄有一個索引 (index.sqlite) 記錄每位球員或每組比較已有哪些資料，
+# 檢查資料是否存在時查詢索引，不需要列出目錄；索引中沒有的資料如果還在舊版平面目錄中，
+# 會在第一次用到時自動移到分片目錄
+player_data_dir = 'nba_player_data'
+comparison_dir = 'nba_player_comparison'
+
+# 函數：取得 ID 對應的分片名稱（補零到 7 位數後取前 4 碼，每個分片最多 1000 個 ID）
+def shard_for(item_id):
+    return str(int(item_id)).zfill(7)[:4]
+
+# 一個分片根目錄的索引
+class ShardIndex:
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        self.db = None
+
+    def _connect(self):
+        if self.db is None:
+            os.makedirs(self.root, exist_ok=True)
+            self.db = sqlite3.connect(os.path.join(self.root, 'index.sqlite'), check_same_thread=False)
+            self.db.execute('''CREATE TABLE IF NOT EXISTS entries (
+                key TEXT,
+                kind TEXT,
+                path TEXT,
+                updated_at REAL,
+                PRIMARY KEY (key, kind)
+            )''')
+            self.db.commit()
+        return self.db
+
+    def add(self, key, kind, path):
+        with self.lock:
+            db = self._connect()
+            db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)', (str(key), kind, path, time.time()))
+            db.commit()
+
+    def remove(self, key, kind):
+        with self.lock:
+            db = self._connect()
+            db.execute('DELETE FROM entries WHERE key = ? AND kind = ?', (str(key), kind))
+            db.commit()
+
+    def has(self, key, kind):
+        with self.lock:
+            row = self._connect().execute(
+                'SELECT 1 FROM entries WHERE key = ? AND kind = ?', (str(key), kind)
+            ).fetchone()
+        return row is not None
+
+    def kinds(self, key):
+        """列出某個鍵已有的資料種類"""
+        with self.lock:
+            rows = self._connect().execute('SELECT kind FROM entries WHERE key = ? ORDER BY kind', (str(key),)).fetchall()
+        return [kind for (kind,) in rows]
+
+    def keys(self):
+        with self.lock:
+            rows = self._connect().execute('SELECT DISTINCT key FROM entries ORDER BY key').fetchall()
+        return [key for (key,) in rows]
+
+    def clear(self):
+        with self.lock:
+            db = self._connect()
+            db.execute('DELETE FROM entries')
+            db.commit()
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+# 函數：取得根目錄對應的索引
+def get_index(root):
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = ShardIndex(root)
+        return index
+
+# 函數：取得球員資料的路徑（不含副檔名），kind 例如 stats、info
+def player_path(player_id, kind):
+    return f'{player_data_dir}/{shard_for(player_id)}/player_{int(player_id)}_{kind}'
+
+# 函數：取得要寫入的球員資料路徑（會建立分片目錄）
+def player_output(player_id, kind):
+    path = player_path(player_id, kind)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+# 函數：資料寫入後登記到索引
+def register_player(player_id, kind):
+    get_index(player_data_dir).add(int(player_id), kind, player_path(player_id, kind))
+
+# 函數：檢查球員資料是否存在（查詢索引）
+# 索引中沒有時檢查舊版平面目錄，找到時把這筆資料移到分片目錄並登記，之後只需要查詢索引
+def player_exists(player_id, kind):
+    try:
+        if get_index(player_data_dir).has(int(player_id), kind):
+            return True
+    except ValueError:
+        return False
+    return _migrate_legacy_player(player_id, kind)
+
+# 函數：取得比較結果的路徑，依第一位球員的 ID 分片
+def comparison_path(player1_id, player2_id, name):
+    return f'{comparison_dir}/{shard_for(player1_id)}/{int(player1_id)}_vs_{int(player2_id)}_{name}'
+
+# 函數：取得要寫入的比較結果路徑（會建立分片目錄）
+def comparison_output(player1_id, player2_id, name):
+    path = comparison_path(player1_id, player2_id, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+# 函數：比較結果寫入後登記到索引
+def register_comparison(player1_id, player2_id, name):
+    key = f'{int(player1_id)}_vs_{int(player2_id)}'
+    get_index(comparison_dir).add(key, name, comparison_path(player1_id, player2_id, name))
+
+# 函數：檢查比較結果是否存在（查詢索引，沒有時檢查舊版平面目錄）
+def comparison_exists(player1_id, player2_id, name):
+    if get_index(comparison_dir).has(f'{int(player1_id)}_vs_{int(player2_id)}', name):
+        return True
+    legacy_path = os.path.join(comparison_dir, f'{int(player1_id)}_vs_{int(player2_id)}_{name}')
+    if not os.path.isfile(legacy_path):
+        return False
+    _move(legacy_path, comparison_path(player1_id, player2_id, name))
+    register_comparison(player1_id, player2_id, name)
+    return True
+
+# 舊版平面目錄中的檔案名稱格式；暫存檔 (.tmp / .part) 不處理
+player_file_pattern = re.compile(r'^player_(\d+)_(stats|info)(\.json|\.feather|\.parquet)?$')
+comparison_file_pattern = re.compile(r'^(\d+)_vs_(\d+)_(.+)$')
+
+def _move(source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    os.replace(source, target)
+
+# 函數：把舊版平面目錄中某位球員的一種資料移到分片目錄並登記，回傳是否找到
+def _migrate_legacy_player(player_id, kind):
+    found = False
+    for ext in ('', '.json', '.feather', '.parquet'):
+        legacy_path = os.path.join(player_data_dir, f'player_{int(player_id)}_{kind}{ext}')
+        if os.path.exists(legacy_path):
+            _move(legacy_path, player_path(player_id, kind) + ext)
+            found = True
+    if found:
+        register_player(player_id, kind)
+    return found
+
+# 函數：把舊版平面目錄中的檔案移到分片目錄並登記到索引，回傳移動的項目數
+def migrate_flat_layout():
+    moved = 0
+    if os.path.isdir(player_data_dir):
+        for name in sorted(os.listdir(player_data_dir)):
+            match = player_file_pattern.match(name)
+            if not match:
+                continue
+            player_id, kind, ext = match.group(1), match.group(2), match.group(3) or ''
+            _move(os.path.join(player_data_dir, name), player_path(player_id, kind) + ext)
+            register_player(player_id, kind)
+            moved += 1
+    if os.path.isdir(comparison_dir):
+        for name in sorted(os.listdir(comparison_dir)):
+            match = comparison_file_pattern.match(name)
+            if not match or not os.path.isfile(os.path.join(comparison_dir, name)):
+                continue
+            player1_id, player2_id, suffix = match.groups()
+            _move(os.path.join(comparison_dir, name), comparison_path(player1_id, player2_id, suffix))
+            register_comparison(player1_id, player2_id, suffix)
+            moved += 1
+    return moved
+
+# 函數：掃描分片目錄重建索引（索引檔遺失或資料被手動移動時使用），回傳登記的項目數
+def rebuild_indexes():
+    count = 0
+    for root, pattern in ((player_data_dir, player_file_pattern), (comparison_dir, comparison_file_pattern)):
+        if not os.path.isdir(root):
+            continue
+        index = get_index(root)
+        index.clear()
+        for shard in sorted(os.listdir(root)):
+            shard_path = os.path.join(root, shard)
+            if not os.path.isdir(shard_path) or not shard.isdigit():
+                continue
+            for name in os.listdir(shard_path):
+                match = pattern.match(name)
+                if not match:
+                    continue
+                if root == player_data_dir:
+                    register_player(match.group(1), match.group(2))
+                else:
+                    register_comparison(*match.groups())
+                count += 1
+    return count
+
+if __name__ == '__main__':
+    # 用法:
+    #   python nba_layout.py --migrate   把舊版平面目錄中的檔案移到分片目錄
+    #   python nba_layout.py --rebuild   掃描分片目錄重建索引
+    if '--migrate' in sys.argv:
+        print(f'已移動 {migrate_flat_layout()} 個項目到分片目錄')
+    elif '--rebuild' in sys.argv:
+        print(f'已重建索引，共 {rebuild_indexes()} 個項目')
+    else:
+        print('用法: python nba_layout.py --migrate | --rebuild')
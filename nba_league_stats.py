@@ -0,0 +1,181 @@
+import os
+import sys
+
+from nba_http import http_get, run_concurrently
+from nba_manifest import get_manifest
+from nba_resultset import decode_columns
+from nba_storage import load_table, save_table, table_exists
+from nba_telemetry import write_summary
+
+# 聯盟球員數據：leaguedashplayerstats 一次回傳某個賽季所有球員的數據，
+# 取代對每位球員各呼叫一次 playercareerstats。
+# 資料依賽季分區儲存：nba_data_json/league_player_stats/season=2024-25/PerGame
+
+# 可以用環境變數 NBA_API_BASE_URL 改為本地的重播伺服器 (nba_replay.py)
+api_base_url = os.environ.get('NBA_API_BASE_URL', 'https://stats.nba.com/stats')
+league_stats_dir = 'nba_data_json/league_player_stats'
+
+headers = {
+    'Referer': 'https://www.nba.com/',
+    'Accept': 'application/json, text/plain, */*',
+}
+
+# leaguedashplayerstats 要求所有參數都必須出現
+base_params = {
+    'LeagueID': '00',
+    'SeasonType': 'Regular Season',
+    'MeasureType': 'Base',
+    'LastNGames': 0,
+    'Month': 0,
+    'OpponentTeamID': 0,
+    'PaceAdjust': 'N',
+    'Period': 0,
+    'PlusMinus': 'N',
+    'Rank': 'N',
+    'TeamID': 0,
+    'College': '',
+    'Conference': '',
+    'Country': '',
+    'DateFrom': '',
+    'DateTo': '',
+    'Division': '',
+    'DraftPick': '',
+    'DraftYear': '',
+    'GameScope': '',
+    'GameSegment': '',
+    'Height': '',
+    'Location': '',
+    'Outcome': '',
+    'PORound': 0,
+    'PlayerExperience': '',
+    'PlayerPosition': '',
+    'SeasonSegment': '',
+    'ShotClockRange': '',
+    'StarterBench': '',
+    'VsConference': '',
+    'VsDivision': '',
+    'Weight': '',
+}
+
+# 函數：取得某個賽季分區的路徑（不含副檔名）
+def partition_path(season, per_mode='PerGame'):
+    return f'{league_stats_dir}/season={season}/{per_mode}'
+
+# 函數：列出已儲存的賽季
+def stored_seasons(per_mode='PerGame'):
+    if not os.path.isdir(league_stats_dir):
+        return []
+    seasons = []
+    for name in sorted(os.listdir(league_stats_dir)):
+        if name.startswith('season=') and table_exists(partition_path(name[len('season='):], per_mode)):
+            seasons.append(name[len('season='):])
+    return seasons
+
+# 函數：下載某個賽季所有球員的數據並儲存到對應分區
+def fetch_season(season, per_mode='PerGame'):
+    params = dict(base_params, Season=season, PerMode=per_mode)
+    print(f'獲取 {season} 賽季聯盟球員數據 ({per_mode})')
+    response = http_get(f'{api_base_url}/leaguedashplayerstats', headers=headers, params=params)
+    if response.status_code != 200:
+        print(f'獲取 {season} 賽季數據失敗，狀態碼: {response.status_code}')
+        return None
+
+    data = response.json()
+    if not data.get('resultSets'):
+        print(f'無法解析 {season} 賽季數據')
+        return None
+
+    columns = decode_columns(data['resultSets'][0])
+    path_base = partition_path(season, per_mode)
+    os.makedirs(os.path.dirname(path_base), exist_ok=True)
+    # 已結束的賽季數據不會再變動，內容相同時不重寫分區
+    changed = get_manifest().write_if_changed(
+        f'league_player_stats/{season}/{per_mode}', columns, lambda: save_table(path_base, columns),
+        exists=lambda: table_exists(path_base)
+    )
+    if changed:
+        print(f"成功儲存 {season} 賽季 {len(columns.get('PLAYER_ID', []))} 位球員的數據")
+    else:
+        print(f'{season} 賽季數據沒有變動')
+    return columns
+
+# 函數：同時下載多個賽季（每個賽季只需要一個請求）
+# 失敗的分區會放回重試佇列，最多再重試 retry_rounds 輪
+def ingest_seasons(seasons, per_modes=('PerGame',), max_workers=None, retry_rounds=1):
+    tasks = [((season, per_mode), fetch_season, (season, per_mode)) for season in seasons for per_mode in per_modes]
+    results, _ = run_concurrently(tasks, max_workers=max_workers, retry_rounds=retry_rounds)
+    return results
+
+# 函數：從聯盟數據中取出單一球員各賽季的數據
+# 回傳與 playercareerstats 相同結構的字典，找不到時回傳 None
+def load_league_player_stats(player_id, per_mode='PerGame'):
+    import pandas as pd
+
+    player_id = int(player_id)
+    seasons = []
+    for season in stored_seasons(per_mode):
+        table = load_table(partition_path(season, per_mode))
+        if table is None or 'PLAYER_ID' not in table:
+            continue
+        rows = table[table['PLAYER_ID'] == player_id]
+        if not rows.empty:
+            seasons.append(rows.assign(SEASON_ID=season))
+    if not seasons:
+        return None
+
+    season_totals = pd.concat(seasons, ignore_index=True).sort_values('SEASON_ID')
+    return {
+        'SeasonTotalsRegularSeason': season_totals,
+        'CareerTotalsRegularSeason': career_totals(season_totals, per_mode),
+    }
+
+# 函數：由各賽季數據計算生涯數據
+# 累計數據直接加總；場均數據與命中率以出場數加權平均
+def career_totals(season_totals, per_mode='PerGame'):
+    import pandas as pd
+
+    numeric = season_totals.select_dtypes('number').drop(columns=['PLAYER_ID', 'TEAM_ID'], errors='ignore')
+    games = season_totals['GP'] if 'GP' in season_totals else None
+    career = {'PLAYER_ID': season_totals['PLAYER_ID'].iloc[0]}
+    for column in numeric.columns:
+        if column == 'GP' or (per_mode == 'Totals' and not column.endswith('_PCT')):
+            career[column] = numeric[column].sum()
+        elif games is not None and games.sum() > 0:
+            career[column] = (numeric[column] * games).sum() / games.sum()
+        else:
+            career[column] = numeric[column].mean()
+    if 'PLAYER_NAME' in season_totals:
+        career['PLAYER_NAME'] = season_totals['PLAYER_NAME'].iloc[-1]
+    return pd.DataFrame([career])
+
+# 函數：從聯盟數據中取得球員名稱（找不到時回傳 None）
+def league_player_name(stats):
+    if not stats:
+        return None
+    career = stats['CareerTotalsRegularSeason']
+    if 'PLAYER_NAME' in career and len(career) > 0:
+        return career['PLAYER_NAME'].iloc[0]
+    return None
+
+# 主函數
+def main():
+    seasons = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if not seasons:
+        print('用法: python nba_league_stats.py <賽季> [<賽季> ...] [--totals] [--workers=N]')
+        print('例如: python nba_league_stats.py 2022-23 2023-24 2024-25')
+        return
+
+    per_modes = ('PerGame', 'Totals') if '--totals' in sys.argv else ('PerGame',)
+    workers = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--workers='):
+            workers = int(arg.split('=', 1)[1])
+
+    results = ingest_seasons(seasons, per_modes, max_workers=workers)
+    failed = [key for key, columns in results.items() if columns is None]
+    print(f'\n完成 {len(results) - len(failed)} 個分區，失敗 {len(failed)} 個')
+    get_manifest().write_changes()
+    write_summary('nba_league_stats')
+
+if __name__ == '__main__':
+    main()
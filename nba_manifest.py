@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+# 跨程序的檔案鎖：Unix 使用 fcntl，Windows 使用 msvcrt
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# 資料清單：記錄每個輸出資料的內容雜湊與抓取時間，
+# 讓爬蟲在內容沒有變動時不重寫檔案，並告訴下游程式哪些資料有變動
+manifest_file = 'nba_data_json/manifest.json'
+changes_file = 'nba_data_json/changed_keys.json'
+
+# 每累積多少次更新就寫入一次清單，避免大量爬取時頻繁重寫
+save_every = 50
+
+# 函數：計算資料內容的雜湊值（字典鍵排序後序列化，確保相同內容得到相同雜湊）
+def content_hash(payload):
+    if isinstance(payload, bytes):
+        data = payload
+    else:
+        data = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+# 檔案鎖：多個程序（例如 nba_backfill.py 的多個分片）同時寫入清單時，一次只讓一個程序合併與寫入
+class FileLock:
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.file = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.file, fcntl.LOCK_UN)
+            else:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.file.close()
+            self.file = None
+
+# 函數：讀取清單檔案，不存在或損壞時回傳空的 dict
+def _read_entries(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# 資料清單
+class Manifest:
+    def __init__(self, path=None):
+        self.path = path or manifest_file
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.changed = []
+        self.unchanged = []
+        self.skipped = []
+        # 上次寫入後在這個程序中更新過的項目，寫入時覆蓋檔案中的同一項目
+        self.dirty = set()
+        self.pending_writes = 0
+        self.entries = _read_entries(self.path)
+
+    def is_stale(self, key, max_age):
+        """資料不存在或超過 max_age 秒沒有抓取時回傳 True"""
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            return True
+        return time.time() - entry['fetched_at'] > max_age
+
+    def skip(self, key):
+        """記錄在增量模式中因為資料尚未過期而略過的項目"""
+        with self.lock:
+            self.skipped.append(key)
+
+    def write_if_changed(self, key, payload, writer, exists=None):
+        """內容有變動（或輸出檔案已不存在）時才呼叫 writer() 寫入檔案，回傳是否有變動"""
+        digest = content_hash(payload)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            changed = entry is None or entry['hash'] != digest
+        if not changed and exists is not None and not exists():
+            changed = True
+        if changed:
+            writer()
+        with self.lock:
+            if changed:
+                self.entries[key] = {'hash': digest, 'fetched_at': now, 'changed_at': now}
+                self.changed.append(key)
+            else:
+                entry['fetched_at'] = now
+                self.unchanged.append(key)
+            self.dirty.add(key)
+            self.pending_writes += 1
+            should_save = self.pending_writes >= save_every
+        if should_save:
+            self.save()
+        return changed
+
+    def save(self):
+        """把本程序更新的項目合併到檔案中目前的清單後寫入，不會覆蓋其他程序寫入的項目"""
+        with self.lock, FileLock(self.path + '.lock'):
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            entries = dict(self.entries)
+            entries.update(_read_entries(self.path))
+            entries.update({key: self.entries[key] for key in self.dirty})
+            # 每次寫入使用不同的暫存檔，寫完再取代
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + '.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self.entries = entries
+            self.dirty.clear()
+            self.pending_writes = 0
+
+    def write_changes(self, path=None):
+        """寫入本次執行的變動清單，供下游程式只處理有變動的資料"""
+        self.save()
+        path = path or changes_file
+        with self.lock:
+            report = {
+                'run_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'changed': sorted(self.changed),
+                'unchanged': sorted(self.unchanged),
+                'skipped': sorted(self.skipped),
+            }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"資料變動：{len(report['changed'])} 項有變動、{len(report['unchanged'])} 項未變動、{len(report['skipped'])} 項略過")
+        return report
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+# 函數：取得共用的資料清單
+def get_manifest():
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = Manifest()
+        return _manifest
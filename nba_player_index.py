@@ -0,0 +1,179 @@
+import difflib
+import json
+import os
+import threading
+import time
+import unicodedata
+
+from nba_http import http_get
+
+# 索引檔案位置
+index_file = 'nba_player_data/player_index.json'
+
+# 索引超過這個時間（秒）就在背景重新下載
+index_max_age = 24 * 3600
+
+# 可以用環境變數 NBA_API_BASE_URL 改為本地的重播伺服器 (nba_replay.py)
+api_base_url = os.environ.get('NBA_API_BASE_URL', 'https://stats.nba.com/stats')
+players_endpoint = 'commonallplayers?LeagueID=00&Season=2024-25&IsOnlyCurrentSeason=1'
+
+headers = {
+    'Referer': 'https://www.nba.com/',
+    'Accept': 'application/json, text/plain, */*',
+}
+
+# 函數：正規化球員名稱（去除重音符號、轉小寫、移除標點）
+def normalize_name(name):
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    cleaned = ''.join(ch if ch.isalnum() else ' ' for ch in stripped.lower())
+    return ' '.join(cleaned.split())
+
+# 前綴樹節點：children 為下一個字元，ids 為經過此節點的球員 ID
+class _TrieNode:
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []
+
+# 本地球員索引
+class PlayerIndex:
+    def __init__(self, headers_list, rows, built_at=None):
+        self.headers = headers_list
+        self.rows = rows
+        self.built_at = built_at or time.time()
+        self.by_id = {}
+        self.normalized = {}
+        self.trie = _TrieNode()
+
+        id_col = headers_list.index('PERSON_ID')
+        name_col = headers_list.index('DISPLAY_FIRST_LAST')
+        for row in rows:
+            player_id = row[id_col]
+            self.by_id[player_id] = row
+            name = normalize_name(row[name_col])
+            self.normalized[player_id] = name
+            # 完整名稱與每個名字片段都加入前綴樹，讓 "james" 也能找到 LeBron James
+            tokens = name.split()
+            for start in range(len(tokens)):
+                self._insert(' '.join(tokens[start:]), player_id)
+
+    def _insert(self, key, player_id):
+        node = self.trie
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+            if not node.ids or node.ids[-1] != player_id:
+                node.ids.append(player_id)
+
+    def to_dict(self, row):
+        return dict(zip(self.headers, row))
+
+    def get(self, player_id):
+        """依 PERSON_ID 取得球員資料（找不到時回傳 None）"""
+        try:
+            row = self.by_id.get(int(player_id))
+        except (TypeError, ValueError):
+            return None
+        return self.to_dict(row) if row is not None else None
+
+    def prefix_search(self, prefix):
+        node = self.trie
+        for ch in normalize_name(prefix):
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return list(dict.fromkeys(node.ids))
+
+    def search(self, query, fuzzy_limit=5):
+        """搜尋球員：先用前綴樹，其次子字串比對，最後才用模糊比對"""
+        normalized_query = normalize_name(query)
+        if not normalized_query:
+            return []
+
+        ids = self.prefix_search(normalized_query)
+        if not ids:
+            ids = [pid for pid, name in self.normalized.items() if normalized_query in name]
+        if not ids:
+            # 模糊比對同時考慮完整名稱與單一名字片段
+            candidates = {}
+            for pid, name in self.normalized.items():
+                candidates.setdefault(name, []).append(pid)
+                for token in name.split():
+                    candidates.setdefault(token, []).append(pid)
+            for name in difflib.get_close_matches(normalized_query, candidates.keys(), n=fuzzy_limit, cutoff=0.75):
+                ids.extend(candidates[name])
+            ids = list(dict.fromkeys(ids))
+        return [self.to_dict(self.by_id[pid]) for pid in ids]
+
+    def is_stale(self):
+        return time.time() - self.built_at > index_max_age
+
+    def save(self, path=None):
+        path = path or index_file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'built_at': self.built_at, 'headers': self.headers, 'rowSet': self.rows}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+# 函數：從 API 下載球員名單並建立索引
+def build_index():
+    response = http_get(f'{api_base_url}/{players_endpoint}', headers=headers)
+    if response.status_code != 200:
+        print(f'下載球員名單失敗，狀態碼: {response.status_code}')
+        return None
+    data = response.json()
+    if 'resultSets' not in data or not data['resultSets']:
+        print('無法解析球員資料')
+        return None
+    players_data = data['resultSets'][0]
+    index = PlayerIndex(players_data['headers'], players_data['rowSet'])
+    index.save()
+    return index
+
+# 函數：從磁碟載入索引
+def load_index(path=None):
+    path = path or index_file
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return PlayerIndex(data['headers'], data['rowSet'], data.get('built_at'))
+    except (OSError, ValueError, KeyError):
+        return None
+
+_index = None
+_index_lock = threading.Lock()
+_refreshing = threading.Event()
+
+def _refresh_in_background():
+    global _index
+    try:
+        index = build_index()
+        if index is not None:
+            with _index_lock:
+                _index = index
+    except Exception as e:
+        print(f'背景更新球員索引時發生錯誤: {e}')
+    finally:
+        _refreshing.clear()
+
+# 函數：取得球員索引
+# 第一次使用時會下載並建立索引；索引過期時沿用舊索引並在背景更新
+def get_player_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = load_index()
+        index = _index
+
+    if index is None:
+        index = build_index()
+        with _index_lock:
+            _index = index
+        return index
+
+    if index.is_stale() and not _refreshing.is_set():
+        _refreshing.set()
+        threading.Thread(target=_refresh_in_background, daemon=True).start()
+    return index
@@ -0,0 +1,126 @@
+import json
+from dataclasses import asdict, dataclass, fields
+
+# NBA.com 的球員頁面是 Next.js 產生的，完整的球員資料以 JSON 形式嵌在
+# <script id="__NEXT_DATA__" type="application/json"> 中。
+# 直接擷取這段 JSON 比解析整個 DOM 快得多，也不受 CSS class 名稱變動影響。
+next_data_marker = 'id="__NEXT_DATA__"'
+
+# 球員個人資料
+@dataclass
+class PlayerProfile:
+    player_id: int = None
+    name: str = None
+    first_name: str = None
+    last_name: str = None
+    team_id: int = None
+    team_name: str = None
+    team_city: str = None
+    team_abbreviation: str = None
+    jersey: str = None
+    position: str = None
+    height: str = None
+    weight: str = None
+    country: str = None
+    school: str = None
+    birthdate: str = None
+    draft_year: str = None
+    draft_round: str = None
+    draft_number: str = None
+    from_year: int = None
+    to_year: int = None
+    season_exp: int = None
+
+    def to_dict(self):
+        return asdict(self)
+
+# 每個欄位可能出現的鍵名（統一轉為小寫並移除底線後比對）
+field_aliases = {
+    'player_id': ('personid', 'playerid'),
+    'name': ('displayfirstlast', 'playername', 'name'),
+    'first_name': ('firstname',),
+    'last_name': ('lastname', 'familyname'),
+    'team_id': ('teamid',),
+    'team_name': ('teamname',),
+    'team_city': ('teamcity',),
+    'team_abbreviation': ('teamabbreviation', 'teamtricode'),
+    'jersey': ('jersey', 'jerseynumber', 'jerseynum'),
+    'position': ('position',),
+    'height': ('height',),
+    'weight': ('weight',),
+    'country': ('country',),
+    'school': ('school', 'college', 'lastaffiliation'),
+    'birthdate': ('birthdate', 'dateofbirthutc'),
+    'draft_year': ('draftyear',),
+    'draft_round': ('draftround',),
+    'draft_number': ('draftnumber',),
+    'from_year': ('fromyear',),
+    'to_year': ('toyear',),
+    'season_exp': ('seasonexp', 'yearsexperience'),
+}
+
+# 函數：從 HTML 中擷取 __NEXT_DATA__ 的 JSON（找不到時回傳 None）
+# 只掃描一次：找到標記後取出到 </script> 為止的內容
+def extract_next_data(html):
+    marker = html.find(next_data_marker)
+    if marker == -1:
+        return None
+    start = html.find('>', marker)
+    end = html.find('</script>', start)
+    if start == -1 or end == -1:
+        return None
+    try:
+        return json.loads(html[start + 1:end])
+    except ValueError:
+        return None
+
+def _normalize_key(key):
+    return key.replace('_', '').lower()
+
+# 函數：在 JSON 樹中尋找球員資料所在的字典（同時有球員 ID 與姓名的第一個字典）
+def _find_player_node(node, depth=0, max_depth=8):
+    if depth > max_depth:
+        return None
+    if isinstance(node, dict):
+        keys = {_normalize_key(key) for key in node}
+        if ('personid' in keys or 'playerid' in keys) and ({'firstname', 'displayfirstlast', 'playername'} & keys):
+            return node
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        if isinstance(child, (dict, list)):
+            found = _find_player_node(child, depth + 1, max_depth)
+            if found is not None:
+                return found
+    return None
+
+# 函數：把球員資料字典轉換為 PlayerProfile
+def profile_from_node(node):
+    values = {_normalize_key(key): value for key, value in node.items() if not isinstance(value, (dict, list))}
+    profile = PlayerProfile()
+    for field in fields(PlayerProfile):
+        for alias in field_aliases[field.name]:
+            if values.get(alias) not in (None, ''):
+                setattr(profile, field.name, values[alias])
+                break
+    if not profile.name and (profile.first_name or profile.last_name):
+        profile.name = ' '.join(part for part in (profile.first_name, profile.last_name) if part)
+    return profile
+
+# 函數：從球員頁面 HTML 解析個人資料（找不到嵌入資料時回傳 None）
+def parse_profile(html):
+    data = extract_next_data(html)
+    if data is None:
+        return None
+    node = _find_player_node(data.get('props', data))
+    if node is None:
+        return None
+    return profile_from_node(node)
+
+# 函數：從已儲存的球員頁面檔案解析個人資料
+def parse_profile_file(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return parse_profile(f.read())
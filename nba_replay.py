@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from nba_http import http_get
+
+# 錄製與重播：先把真實的回應錄製成檔案，之後由本地的重播伺服器提供，
+# 讓爬蟲不需要連線到 nba.com 也能執行、測試與量測效能。
+#
+# 重播伺服器以主機名稱作為路徑前綴，例如
+#   http://127.0.0.1:8765/stats.nba.com/stats/leaguestandingsv3?...
+#   http://127.0.0.1:8765/www.nba.com/player/2544/profile
+# 爬蟲只要設定環境變數即可改連重播伺服器：
+#   NBA_BASE_URL=http://127.0.0.1:8765/www.nba.com
+#   NBA_API_BASE_URL=http://127.0.0.1:8765/stats.nba.com/stats
+fixtures_dir = 'nba_fixtures'
+
+# 錄製時一律使用真實網址（不受環境變數影響）
+real_base_url = 'https://www.nba.com'
+real_api_base_url = 'https://stats.nba.com/stats'
+
+# 預設錄製的球員：LeBron James、Kevin Durant、Stephen Curry
+default_player_ids = [2544, 201142, 201939]
+
+default_port = 8765
+
+# 函數：把網址轉換為錄製檔的鍵：主機名稱 + 路徑 + 排序後的查詢參數
+def fixture_key(url):
+    parsed = urlparse(url)
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    key = f'{parsed.hostname}{parsed.path.rstrip("/")}'
+    return f'{key}?{query}' if query else key
+
+# 函數：把重播伺服器收到的路徑（/主機名稱/路徑?查詢）轉換為錄製檔的鍵
+def request_key(path):
+    return fixture_key('http:/' + path)
+
+# 錄製檔集合：index.json 記錄每個鍵對應的檔案、狀態碼與內容類型
+class FixtureStore:
+    def __init__(self, directory=None):
+        self.directory = directory or fixtures_dir
+        self.index_path = os.path.join(self.directory, 'index.json')
+        self.lock = threading.Lock()
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def get(self, key):
+        """回傳 (項目, 內容)，沒有錄製時回傳 (None, None)"""
+        entry = self.index.get(key)
+        if entry is None:
+            return None, None
+        with open(os.path.join(self.directory, entry['file']), 'rb') as f:
+            return entry, f.read()
+
+    def put(self, key, status, content_type, body):
+        digest = hashlib.sha256(body).hexdigest()
+        filename = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + '.body'
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, filename), 'wb') as f:
+            f.write(body)
+        with self.lock:
+            self.index[key] = {
+                'file': filename,
+                'status': status,
+                'content_type': content_type,
+                'etag': f'"{digest[:16]}"',
+                'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+# 函數：列出爬蟲會使用的所有網址
+def default_urls(player_ids=None, team_ids=None):
+    from nba_advanced_scraper import build_tasks, endpoints
+    from nba_player_index import players_endpoint
+    from nba_scraper import allowed_paths, teams
+
+    player_ids = player_ids or default_player_ids
+    if team_ids is None:
+        team_ids = [args[0] for name, func, args in build_tasks() if name.startswith('team_')]
+
+    urls = [f'{real_api_base_url}/{endpoint}' for endpoint in endpoints.values()]
+    urls.append(f'{real_base_url}/schedule')
+    urls += [f'{real_api_base_url}/teaminfocommon?TeamID={team_id}&LeagueID=00' for team_id in team_ids]
+    urls.append(f'{real_api_base_url}/{players_endpoint}')
+    for player_id in player_ids:
+        urls.append(f'{real_base_url}/player/{player_id}/profile')
+        urls.append(f'{real_api_base_url}/playercareerstats?PlayerID={player_id}&PerMode=PerGame')
+    urls += [real_base_url + path for path in allowed_paths]
+    urls += [f'{real_base_url}/team/{team}' for team in teams]
+    return list(dict.fromkeys(urls))
+
+# 函數：從已錄製的排名資料取得所有球隊 ID
+def recorded_team_ids(store):
+    from nba_advanced_scraper import endpoints
+    from nba_resultset import decode_columns
+
+    entry, body = store.get(fixture_key(f"{real_api_base_url}/{endpoints['standings']}"))
+    if entry is None:
+        return []
+    columns = decode_columns(json.loads(body)['resultSets'][0])
+    return [int(team_id) for team_id in columns.get('TeamID', columns.get('TEAM_ID', []))]
+
+# 函數：錄製網址列表的回應（只保存狀態碼 200 的回應）
+def record(urls, store=None):
+    from nba_advanced_scraper import headers
+
+    store = store or FixtureStore()
+    recorded = 0
+    for url in urls:
+        try:
+            response = http_get(url, headers=headers, use_cache=False)
+        except Exception as e:
+            print(f'錄製 {url} 失敗: {e}')
+            continue
+        if response.status_code != 200:
+            print(f'錄製 {url} 失敗，狀態碼: {response.status_code}')
+            continue
+        store.put(fixture_key(url), response.status_code, response.headers.get('Content-Type'), response.content)
+        recorded += 1
+        print(f'已錄製: {fixture_key(url)} ({len(response.content)} bytes)')
+    store.save()
+    print(f'共錄製 {recorded}/{len(urls)} 個回應到 {store.directory}')
+    return store
+
+# 重播伺服器的請求處理
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        if server.latency or server.jitter:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+
+        if server.throttled():
+            self._send(429, b'', {'Retry-After': str(server.retry_after)})
+            return
+
+        entry, body = server.store.get(request_key(self.path))
+        if entry is None:
+            self._send(404, b'fixture not found', {'Content-Type': 'text/plain'})
+            return
+        if self.headers.get('If-None-Match') == entry['etag']:
+            self._send(304, b'', {'ETag': entry['etag']})
+            return
+        self._send(entry['status'], body, {'Content-Type': entry['content_type'] or 'application/octet-stream',
+                                           'ETag': entry['etag']})
+
+    def _send(self, status, body, headers):
+        with self.server.lock:
+            self.server.statuses[status] = self.server.statuses.get(status, 0) + 1
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+# 重播伺服器
+# latency/jitter：每個回應延遲的秒數（jitter 為額外的隨機延遲上限）
+# throttle_rps：每秒最多回應的請求數，超過時回應 429（0 表示不限制）
+# throttle_ratio：隨機以 429 回應的比例
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, store, host='127.0.0.1', port=default_port, latency=0.0, jitter=0.0, throttle_rps=0,
+                 throttle_ratio=0.0, retry_after=1, verbose=False):
+        super().__init__((host, port), ReplayHandler)
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rps = throttle_rps
+        self.throttle_ratio = throttle_ratio
+        self.retry_after = retry_after
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.statuses = {}
+        self.window_started = time.monotonic()
+        self.window_count = 0
+
+    @property
+    def base(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def base_url(self):
+        return f'{self.base}/www.nba.com'
+
+    @property
+    def api_base_url(self):
+        return f'{self.base}/stats.nba.com/stats'
+
+    def throttled(self):
+        if self.throttle_ratio and random.random() < self.throttle_ratio:
+            return True
+        if not self.throttle_rps:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_started >= 1:
+                self.window_started = now
+                self.window_count = 0
+            self.window_count += 1
+            return self.window_count > self.throttle_rps
+
+# 函數：在背景執行緒啟動重播伺服器（port=0 時自動選擇可用的連接埠）
+def start_server(directory=None, port=0, **options):
+    server = ReplayServer(FixtureStore(directory), port=port, **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+# 讀取 NBA_BASE_URL / NBA_API_BASE_URL 的爬蟲模組
+scraper_modules = ('nba_advanced_scraper', 'nba_league_stats', 'nba_player_index', 'nba_scraper',
+                   'player_specific_scraper')
+
+# 函數：讓爬蟲改連重播伺服器
+# 設定環境變數給之後匯入的模組，已經匯入的模組則直接更新網址
+def use_server(server):
+    os.environ['NBA_BASE_URL'] = server.base_url
+    os.environ['NBA_API_BASE_URL'] = server.api_base_url
+    for name in scraper_modules:
+        module = sys.modules.get(name)
+        if module is None:
+            continue
+        if hasattr(module, 'base_url'):
+            module.base_url = server.base_url
+        if hasattr(module, 'api_base_url'):
+            module.api_base_url = server.api_base_url
+
+def _parse_options(argv):
+    options = {}
+    for arg in argv:
+        if '=' not in arg or not arg.startswith('--'):
+            continue
+        name, value = arg[2:].split('=', 1)
+        options[name.replace('-', '_')] = value
+    return options
+
+# 主函數
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('record', 'serve'):
+        print('用法:')
+        print('  python nba_replay.py record [--players=2544,201142] [--all-teams] [--dir=nba_fixtures]')
+        print('  python nba_replay.py serve [--port=8765] [--latency=0.05] [--jitter=0.02] '
+              '[--throttle-rps=5] [--throttle-ratio=0.1] [--dir=nba_fixtures]')
+        return
+
+    options = _parse_options(sys.argv[2:])
+    directory = options.get('dir')
+
+    if sys.argv[1] == 'record':
+        player_ids = [int(i) for i in options['players'].split(',')] if 'players' in options else None
+        store = record(default_urls(player_ids), FixtureStore(directory))
+        if '--all-teams' in sys.argv:
+            urls = [f'{real_api_base_url}/teaminfocommon?TeamID={team_id}&LeagueID=00'
+                    for team_id in recorded_team_ids(store)]
+            record(urls, store)
+        return
+
+    server = ReplayServer(
+        FixtureStore(directory),
+        port=int(options.get('port', default_port)),
+        latency=float(options.get('latency', 0)),
+        jitter=float(options.get('jitter', 0)),
+        throttle_rps=int(options.get('throttle_rps', 0)),
+        throttle_ratio=float(options.get('throttle_ratio', 0)),
+        verbose=True,
+    )
+    print(f'重播伺服器已啟動: {server.base}（{len(server.store.index)} 個錄製回應）')
+    print(f'  NBA_BASE_URL={server.base_url}')
+    print(f'  NBA_API_BASE_URL={server.api_base_url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import sys
+import time
+
+# stats.nba.com 的回應格式：
+# {'resultSets': [{'name': ..., 'headers': [...], 'rowSet': [[...], ...]}, ...]}
+# 這個模組集中處理 headers/rowSet 的轉換，避免每個爬蟲各自逐列建立字典
+
+# 函數：依名稱取得所有 resultSet
+def result_sets_by_name(data):
+    return {result_set['name']: result_set for result_set in data.get('resultSets', [])}
+
+# 函數：轉換為欄位導向的資料 {欄位名稱: 該欄所有值}
+# zip(*rowSet) 在 C 層一次完成轉置，不需要為每一列建立字典
+def decode_columns(result_set):
+    headers_list = result_set['headers']
+    rows = result_set['rowSet']
+    if not rows:
+        return {header: [] for header in headers_list}
+    return {header: list(column) for header, column in zip(headers_list, zip(*rows))}
+
+# 函數：直接轉換為 DataFrame，由 pandas 推斷每一欄的型別
+def to_dataframe(result_set):
+    import pandas as pd
+    return pd.DataFrame(result_set['rowSet'], columns=result_set['headers'])
+
+# 函數：轉換為列導向的字典列表（與原本儲存的 JSON 格式相同）
+def to_records(result_set):
+    headers_list = result_set['headers']
+    return [dict(zip(headers_list, row)) for row in result_set['rowSet']]
+
+# 函數：取得第一列資料（找不到時回傳空字典），用於只有一列的 resultSet
+def first_record(result_set):
+    if not result_set or not result_set['rowSet']:
+        return {}
+    return dict(zip(result_set['headers'], result_set['rowSet'][0]))
+
+# 原本爬蟲中逐欄建立字典的寫法，保留作為效能比較的基準
+def _legacy_records(result_set):
+    headers_list = result_set['headers']
+    records = []
+    for row in result_set['rowSet']:
+        record = {}
+        for i, header in enumerate(headers_list):
+            record[header] = row[i]
+        records.append(record)
+    return records
+
+# 函數：建立與選秀歷史大小相近的測試資料
+def _sample_result_set(rows=8000):
+    headers_list = ['PERSON_ID', 'PLAYER_NAME', 'SEASON', 'ROUND_NUMBER', 'ROUND_PICK', 'OVERALL_PICK',
+                    'DRAFT_TYPE', 'TEAM_ID', 'TEAM_CITY', 'TEAM_NAME', 'TEAM_ABBREVIATION',
+                    'ORGANIZATION', 'ORGANIZATION_TYPE', 'PLAYER_PROFILE_FLAG']
+    row_set = []
+    for i in range(rows):
+        row_set.append([i, f'Player {i}', str(1947 + i % 78), 1 + i % 2, 1 + i % 30, 1 + i % 60,
+                        'Draft', 1610612737 + i % 30, 'City', 'Team', 'TM',
+                        f'College {i % 300}', 'College/University', 1])
+    return {'name': 'DraftHistory', 'headers': headers_list, 'rowSet': row_set}
+
+def _best_of(func, arg, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+# 函數：比較原本逐列建立字典的做法與欄位導向解碼的速度
+def run_benchmark(rows=8000, repeat=20):
+    import pandas as pd
+
+    result_set = _sample_result_set(rows)
+    cases = [
+        ('逐列建立字典（原本做法）', _legacy_records),
+        ('逐列字典 + pd.DataFrame', lambda rs: pd.DataFrame(_legacy_records(rs))),
+        ('to_records', to_records),
+        ('decode_columns', decode_columns),
+        ('to_dataframe', to_dataframe),
+        ('decode_columns + pd.DataFrame', lambda rs: pd.DataFrame(decode_columns(rs))),
+    ]
+    print(f'resultSet 解碼效能比較（{rows} 列 x {len(result_set["headers"])} 欄，取 {repeat} 次中最快）')
+    baseline = None
+    for name, func in cases:
+        seconds = _best_of(func, result_set, repeat)
+        if baseline is None:
+            baseline = seconds
+        print(f'  {name:<28} {seconds * 1000:8.2f} ms  ({baseline / seconds:.1f}x)')
+
+if __name__ == '__main__':
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 8000)
@@ -1,12 +1,19 @@
-import requests
 import time
-from bs4 import BeautifulSoup
 import json
 import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
 
-# 創建目錄來儲存爬取的資料
-if not os.path.exists('nba_data'):
-    os.makedirs('nba_data')
+from nba_html import LinkStreamParser, parse_file, player_link_strainer
+from nba_http import http_download, http_get
+from nba_manifest import content_hash, get_manifest
+from nba_telemetry import write_summary
+
+# 儲存爬取資料的目錄在寫入時才建立 (http_download)，匯入這個模組不會建立目錄
 
 # 根據robots.txt允許的路徑
 allowed_paths = [
@@ -23,7 +30,8 @@ allowed_paths = [
 teams = ['celtics','warriors','lakers']
 
 # 基本URL
-base_url = 'https://www.nba.com'
+# 可以用環境變數 NBA_BASE_URL 改為本地的重播伺服器 (nba_replay.py)
+base_url = os.environ.get('NBA_BASE_URL', 'https://www.nba.com')
 
 # 用於發送請求的標頭
 headers = {
@@ -31,18 +39,20 @@ headers = {
 }
 
 # 函數：爬取一個頁面並保存
-def scrape_page(url, filename):
+# 回應內容邊下載邊寫入檔案；只有 parse=True 時才解析，strainer 可限制只解析需要的節點
+# parse=True 時回傳解析結果，否則回傳儲存的檔案路徑，失敗時回傳 None
+def scrape_page(url, filename, parse=False, strainer=None):
     try:
         print(f'正在爬取: {url}')
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            with open(f'nba_data/{filename}.html', 'w', encoding='utf-8') as f:
-                f.write(soup.prettify())
-            print(f'成功保存: {filename}.html')
-            return soup
+        path = f'nba_data/{filename}.html'
+        status_code, size = http_download(url, path, headers=headers)
+        if status_code == 200:
+            print(f'成功保存: {filename}.html ({size} bytes)')
+            if parse:
+                return parse_file(path, strainer)
+            return path
         else:
-            print(f'請求失敗，狀態碼: {response.status_code}')
+            print(f'請求失敗，狀態碼: {status_code}')
             return None
     except Exception as e:
         print(f'爬取錯誤: {e}')
@@ -50,7 +60,7 @@ def scrape_page(url, filename):
 
 # 函數：爬取球員資料
 def scrape_players():
-    soup = scrape_page(f'{base_url}/players', 'players_list')
+    soup = scrape_page(f'{base_url}/players', 'players_list', parse=True, strainer=player_link_strainer())
     if soup:
         # 尋找球員連結
         player_links = []
@@ -71,6 +81,162 @@ def scrape_players():
             scrape_page(player_url, f'player_{player_id}')
             time.sleep(1)  # 避免請求過於頻繁
 
+# 完整爬取模式：已下載的球員頁面在這段時間（秒）內不重新下載
+page_max_age = 24 * 3600
+
+player_id_pattern = re.compile(r'/player/(\d+)')
+
+# 函數：讀取網站的 robots.txt，讀取失敗時回傳 None
+def load_robots(url=None):
+    url = url or f'{base_url}/robots.txt'
+    try:
+        response = http_get(url, headers=headers)
+    except Exception as e:
+        print(f'無法讀取 robots.txt: {e}')
+        return None
+    if response.status_code != 200:
+        print(f'無法讀取 robots.txt，狀態碼: {response.status_code}')
+        return None
+    robots = RobotFileParser(url)
+    robots.parse(response.text.splitlines())
+    return robots
+
+# 函數：判斷網址是否允許爬取
+# 有 robots.txt 時依其規則判斷；沒有時只允許 allowed_paths 與球員個人頁面
+def is_allowed(url, robots=None):
+    # 以網站內的路徑判斷（base_url 指向重播伺服器時會帶有主機名稱前綴）
+    path = url[len(base_url):] if url.startswith(base_url) else urlparse(url).path
+    if robots is not None:
+        return robots.can_fetch(headers['User-Agent'], path)
+    return path.startswith('/player/') or any(path.startswith(allowed) for allowed in allowed_paths)
+
+# 每個主機的請求額度：完整爬取時每個主機最多發送 limit 個請求（None 表示不限制）
+class RequestBudget:
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.used = {}
+        self.lock = threading.Lock()
+
+    def take(self, url):
+        """取得一個請求額度，額度用完時回傳 False"""
+        host = urlparse(url).hostname or ''
+        with self.lock:
+            used = self.used.get(host, 0)
+            if self.limit is not None and used >= self.limit:
+                return False
+            self.used[host] = used + 1
+            return True
+
+# 完整爬取所有球員頁面
+# 球員名單頁面一邊下載一邊解析，每找到一個球員連結就立即交給工作池下載，
+# 工作池的排隊數量有上限，每個主機的速率仍由 nba_http 的權杖桶控制
+class PlayerCrawler:
+    def __init__(self, max_workers=4, budget=None, max_age=None, robots=None):
+        self.max_workers = max_workers
+        self.budget = RequestBudget(budget)
+        self.max_age = page_max_age if max_age is None else max_age
+        self.robots = robots
+        self.manifest = get_manifest()
+        self.executor = None
+        self.slots = threading.BoundedSemaphore(max_workers * 2)
+        self.lock = threading.Lock()
+        self.links = []
+        self.seen = set()
+        self.counts = {'fetched': 0, 'unchanged': 0, 'skipped': 0, 'disallowed': 0, 'over_budget': 0, 'failed': 0}
+
+    def _count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def on_link(self, href):
+        match = player_id_pattern.search(href)
+        if not match or match.group(1) in self.seen:
+            return
+        player_id = match.group(1)
+        self.seen.add(player_id)
+        self.links.append(href)
+        url = href if href.startswith('http') else base_url + href
+        if not is_allowed(url, self.robots):
+            self._count('disallowed')
+            return
+        # 排隊中的工作達到上限時等待，避免名單很長時一次建立所有工作
+        self.slots.acquire()
+        future = self.executor.submit(self.fetch, url, player_id)
+        future.add_done_callback(lambda done: self.on_done(done, url))
+
+    def on_done(self, future, url):
+        """工作結束時釋放排隊名額；fetch 中未處理的例外記錄為失敗，不會被忽略"""
+        self.slots.release()
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            print(f'爬取 {url} 時發生錯誤: {error}')
+            self._count('failed')
+
+    def fetch(self, url, player_id):
+        name = f'player_{player_id}'
+        path = f'nba_data/{name}.html'
+        key = f'page/{name}'
+        # 已下載且仍在有效期限內的頁面不重新下載
+        if os.path.exists(path) and not self.manifest.is_stale(key, self.max_age):
+            self.manifest.skip(key)
+            self._count('skipped')
+            return
+        if not self.budget.take(url):
+            self._count('over_budget')
+            return
+        tmp_path = path + '.part'
+        # 例外由 on_done 記錄為失敗；除了成功取代原檔之外，暫存檔一律刪除
+        try:
+            status_code, size = http_download(url, tmp_path, headers=headers)
+            if status_code != 200:
+                print(f'爬取 {url} 失敗，狀態碼: {status_code}')
+                self._count('failed')
+                return
+            with open(tmp_path, 'rb') as f:
+                digest = content_hash(f.read())
+            # 內容沒有變動時保留原本的檔案
+            changed = self.manifest.write_if_changed(key, digest, lambda: os.replace(tmp_path, path),
+                                                     exists=lambda: os.path.exists(path))
+            if changed:
+                self._count('fetched')
+                print(f'成功保存: {name}.html ({size} bytes)')
+            else:
+                self._count('unchanged')
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def run(self):
+        list_url = f'{base_url}/players'
+        print(f'正在爬取: {list_url}')
+        parser = LinkStreamParser(self.on_link)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self.executor = executor
+            status_code, _ = http_download(list_url, 'nba_data/players_list.html', headers=headers,
+                                           on_chunk=parser.feed_bytes)
+            if status_code == 200:
+                parser.close()
+            else:
+                print(f'請求失敗，狀態碼: {status_code}')
+        self.executor = None
+
+        os.makedirs('nba_data', exist_ok=True)
+        with open('nba_data/player_links.json', 'w', encoding='utf-8') as f:
+            json.dump(self.links, f, ensure_ascii=False, indent=4)
+        counts = self.counts
+        print(f"\n共找到 {len(self.links)} 位球員：下載 {counts['fetched']}、內容未變動 {counts['unchanged']}、"
+              f"未過期略過 {counts['skipped']}、robots 不允許 {counts['disallowed']}、"
+              f"超過額度 {counts['over_budget']}、失敗 {counts['failed']}")
+        self.manifest.write_changes()
+        return counts
+
+# 函數：完整爬取所有球員頁面
+def crawl_players(max_workers=4, budget=None, max_age=None):
+    robots = load_robots()
+    return PlayerCrawler(max_workers, budget, max_age, robots).run()
+
 # 函數：爬取球隊資料
 def scrape_teams():
     for team in teams:
@@ -80,6 +246,19 @@ def scrape_teams():
 
 # 開始爬取
 def main():
+    # 完整爬取模式：--full [--workers=N] [--budget=N]
+    if '--full' in sys.argv:
+        workers = 4
+        budget = None
+        for arg in sys.argv[1:]:
+            if arg.startswith('--workers='):
+                workers = int(arg.split('=', 1)[1])
+            elif arg.startswith('--budget='):
+                budget = int(arg.split('=', 1)[1])
+        crawl_players(max_workers=workers, budget=budget)
+        write_summary('nba_scraper')
+        return
+    
     # 爬取允許的頁面
     for path in allowed_paths:
         page_name = path.replace('/', '_').strip('_')
@@ -93,6 +272,9 @@ def main():
     # 爬取球隊資料
     print('\n開始爬取球隊資料...')
     scrape_teams()
+    
+    # 寫入本次執行的遙測摘要 (nba_telemetry 目錄)
+    write_summary('nba_scraper')
 
 if __name__ == '__main__':
     main()
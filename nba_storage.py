@@ -0,0 +1,218 @@
+import importlib.util
+import json
+import os
+import shutil
+
+# 資料表的儲存格式：
+#   feather - Arrow IPC 檔案，讀取時以記憶體映射 (memory map) 開啟，幾乎不需要複製
+#   parquet - 壓縮率較高的欄位式格式，適合長期保存
+#   json    - 與原本相同的 JSON 格式，方便人工檢視或給其他工具使用
+# 可以用環境變數 NBA_STORAGE_FORMAT 或 set_storage_format() 指定
+supported_formats = ('feather', 'parquet', 'json')
+
+extensions = {
+    'feather': '.feather',
+    'parquet': '.parquet',
+    'json': '.json',
+}
+
+# 只檢查是否已安裝，實際讀寫時才匯入 pyarrow
+_has_arrow = importlib.util.find_spec('pyarrow') is not None
+
+storage_format = os.environ.get('NBA_STORAGE_FORMAT', 'feather' if _has_arrow else 'json')
+
+# 函數：設定之後儲存資料表時使用的格式
+def set_storage_format(fmt):
+    global storage_format
+    if fmt not in supported_formats:
+        raise ValueError(f'不支援的儲存格式: {fmt}')
+    storage_format = fmt
+
+def _resolve_format(fmt):
+    fmt = fmt or storage_format
+    if fmt != 'json' and not _has_arrow:
+        print('警告：未安裝 pyarrow，改用 JSON 格式儲存')
+        return 'json'
+    return fmt
+
+# 函數：把各種輸入統一轉換為 {欄位: 值列表}
+# 接受 nba_resultset.decode_columns 的結果、字典列表或 DataFrame
+def _to_columns(data):
+    if isinstance(data, dict):
+        return data
+    if hasattr(data, 'to_dict'):
+        return data.to_dict(orient='list')
+    columns = {}
+    for record in data:
+        for key in record:
+            columns.setdefault(key, [])
+    for record in data:
+        for key, values in columns.items():
+            values.append(record.get(key))
+    return columns
+
+def _to_records(columns):
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+def _write_arrow(path, columns, fmt):
+    import pyarrow as pa
+
+    arrays = {}
+    for name, values in columns.items():
+        try:
+            arrays[name] = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # 同一欄混合了不同型別（例如數字與字串），改以字串儲存
+            arrays[name] = pa.array([None if value is None else str(value) for value in values])
+    table = pa.Table.from_pydict(arrays)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    if fmt == 'feather':
+        import pyarrow.feather as feather
+        # 不壓縮，讀取時才能直接映射到記憶體
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+def _read_table_file(path):
+    import pandas as pd
+
+    if path.endswith('.feather'):
+        import pyarrow.feather as feather
+        return feather.read_table(path, memory_map=True).to_pandas()
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_table(path, memory_map=True).to_pandas()
+    with open(path, 'r', encoding='utf-8') as f:
+        return pd.DataFrame(json.load(f))
+
+# 函數：找出已存在的檔案，若有多種格式則使用最新寫入的那一個
+def _find_existing(candidates):
+    existing = [path for path in candidates if os.path.exists(path)]
+    if not existing:
+        return None
+    return max(existing, key=os.path.getmtime)
+
+# 函數：儲存資料表，path_base 為不含副檔名的路徑（例如 nba_data_json/standings）
+def save_table(path_base, data, fmt=None):
+    fmt = _resolve_format(fmt)
+    path = path_base + extensions[fmt]
+    columns = _to_columns(data)
+    if fmt == 'json':
+        _write_json(path, _to_records(columns))
+    else:
+        _write_arrow(path, columns, fmt)
+    return path
+
+# 函數：讀取資料表為 DataFrame（找不到或讀取失敗時回傳 None）
+def load_table(path_base):
+    path = _find_existing([path_base + ext for ext in extensions.values()])
+    if path is None:
+        print(f'找不到資料檔案: {path_base}')
+        return None
+    try:
+        return _read_table_file(path)
+    except Exception as e:
+        print(f'無法讀取檔案 {path}: {e}')
+        return None
+
+# 函數：檢查資料表是否存在（任何格式）
+def table_exists(path_base):
+    return any(os.path.exists(path_base + ext) for ext in extensions.values())
+
+# 函數：儲存一組資料表（例如球員統計的各個 resultSet）
+# 欄位式格式存成目錄 path_base/，每個資料表一個檔案；JSON 格式存成單一檔案
+def save_table_set(path_base, tables, fmt=None):
+    fmt = _resolve_format(fmt)
+    if fmt == 'json':
+        payload = {name: _to_records(_to_columns(data)) for name, data in tables.items()}
+        path = path_base + '.json'
+        _write_json(path, payload)
+        return path
+
+    tmp_dir = path_base + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, data in tables.items():
+        _write_arrow(os.path.join(tmp_dir, name + extensions[fmt]), _to_columns(data), fmt)
+    shutil.rmtree(path_base, ignore_errors=True)
+    os.replace(tmp_dir, path_base)
+    return path_base
+
+# 函數：讀取一組資料表，回傳 {名稱: DataFrame}（找不到或讀取失敗時回傳 None）
+def load_table_set(path_base):
+    json_path = path_base + '.json'
+    use_dir = os.path.isdir(path_base)
+    if use_dir and os.path.exists(json_path):
+        use_dir = os.path.getmtime(path_base) >= os.path.getmtime(json_path)
+    try:
+        if use_dir:
+            tables = {}
+            for filename in sorted(os.listdir(path_base)):
+                name, ext = os.path.splitext(filename)
+                if ext in ('.feather', '.parquet'):
+                    tables[name] = _read_table_file(os.path.join(path_base, filename))
+            return tables
+        if os.path.exists(json_path):
+            import pandas as pd
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return {name: pd.DataFrame(records) for name, records in json.load(f).items()}
+    except Exception as e:
+        print(f'無法讀取資料 {path_base}: {e}')
+        return None
+    print(f'找不到資料檔案: {path_base}')
+    return None
+
+# 函數：檢查一組資料表是否存在（任何格式）
+def table_set_exists(path_base):
+    return os.path.isdir(path_base) or os.path.exists(path_base + '.json')
+
+# 函數：儲存單筆記錄（例如球員基本資訊），一律使用 JSON
+def save_record(path_base, record):
+    path = path_base + '.json'
+    _write_json(path, record)
+    return path
+
+# 函數：讀取單筆記錄（找不到或讀取失敗時回傳 None）
+def load_record(path_base):
+    try:
+        with open(path_base + '.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f'無法讀取檔案 {path_base}.json: {e}')
+        return None
+
+# 函數：檢查單筆記錄是否存在
+def record_exists(path_base):
+    return os.path.exists(path_base + '.json')
+
+# 函數：把已儲存的資料表或資料表組匯出為 JSON
+def export_json(path_base):
+    if table_set_exists(path_base) and not table_exists(path_base):
+        tables = load_table_set(path_base)
+        if tables is not None:
+            return save_table_set(path_base, tables, fmt='json')
+        return None
+    table = load_table(path_base)
+    if table is not None:
+        return save_table(path_base, table, fmt='json')
+    return None
+
+if __name__ == '__main__':
+    import sys
+
+    # 用法: python nba_storage.py <不含副檔名的路徑> ...
+    for path_base in sys.argv[1:]:
+        exported = export_json(path_base)
+        if exported:
+            print(f'已匯出: {exported}')
@@ -0,0 +1,193 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+# 爬取遙測：記錄每個端點的延遲、傳輸量、狀態碼、重試次數與快取命中率
+# 每次執行結束時輸出 JSON 摘要與 Prometheus 文字格式檔案，方便長期追蹤爬取效能
+telemetry_dir = 'nba_telemetry'
+
+# 延遲直方圖的區間上限（秒）
+latency_buckets = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 函數：把網址轉換為端點名稱，路徑中的數字 ID 以 {id} 取代，避免每位球員各自成為一個端點
+# 例如 https://www.nba.com/player/2544/profile -> www.nba.com/player/{id}/profile
+def endpoint_name(url):
+    parsed = urlparse(url)
+    path = re.sub(r'/\d+(?=/|$)', '/{id}', parsed.path.rstrip('/'))
+    return f'{parsed.hostname or ""}{path}'
+
+# 單一端點的統計
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.bucket_counts = [0] * len(latency_buckets)
+        self.statuses = Counter()
+        self.cache = Counter()
+
+    def observe(self, latency):
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+        for i, bound in enumerate(latency_buckets):
+            if latency <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def to_dict(self):
+        # 直方圖以累計次數表示，與 Prometheus 相同
+        cumulative = {}
+        total = 0
+        for bound, count in zip(latency_buckets, self.bucket_counts):
+            total += count
+            cumulative[str(bound)] = total
+        cumulative['+Inf'] = self.requests + self.errors
+        observed = self.requests + self.errors
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'bytes': self.bytes,
+            'latency_avg': self.latency_sum / observed if observed else 0.0,
+            'latency_max': self.latency_max,
+            'latency_sum': self.latency_sum,
+            'latency_buckets': cumulative,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'cache': dict(self.cache),
+        }
+
+# 整個執行過程的遙測資料
+class Telemetry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.started_at = time.time()
+        # 實際送出請求的耗時總和（不含直接使用快取的回應、等待權杖與重試前的等待）
+        self.network_seconds = 0.0
+
+    def _stats(self, url):
+        name = endpoint_name(url)
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = EndpointStats()
+        return stats
+
+    def record_request(self, url, status, latency, nbytes=0, retries=0, cache=None):
+        """記錄一次完成的請求；cache 為 hit（直接使用快取）、revalidated（304）、miss 或 None（未使用快取）"""
+        with self.lock:
+            stats = self._stats(url)
+            stats.requests += 1
+            stats.retries += retries
+            stats.bytes += nbytes
+            stats.statuses[status] += 1
+            if cache:
+                stats.cache[cache] += 1
+            if cache != 'hit':
+                self.network_seconds += latency
+            stats.observe(latency)
+
+    def record_error(self, url, latency, retries=0):
+        """記錄一次重試後仍然失敗（連線錯誤或逾時）的請求"""
+        with self.lock:
+            stats = self._stats(url)
+            stats.errors += 1
+            stats.retries += retries
+            self.network_seconds += latency
+            stats.observe(latency)
+
+    def summary(self, run_name=None):
+        with self.lock:
+            endpoints = {name: stats.to_dict() for name, stats in sorted(self.endpoints.items())}
+            network_seconds = self.network_seconds
+        elapsed = time.time() - self.started_at
+        total_bytes = sum(stats['bytes'] for stats in endpoints.values())
+        total_requests = sum(stats['requests'] + stats['errors'] for stats in endpoints.values())
+        return {
+            'run': run_name,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'elapsed_seconds': elapsed,
+            'requests': total_requests,
+            'bytes': total_bytes,
+            'requests_per_second': total_requests / elapsed if elapsed > 0 else 0.0,
+            'network_seconds': network_seconds,
+            'bytes_per_second': total_bytes / elapsed if elapsed > 0 else 0.0,
+            'endpoints': endpoints,
+        }
+
+    def to_prometheus(self, summary):
+        """把摘要轉換為 Prometheus 文字格式"""
+        run = summary['run'] or 'scrape'
+        lines = [
+            '# HELP nba_scrape_request_duration_seconds Request latency per endpoint.',
+            '# TYPE nba_scrape_request_duration_seconds histogram',
+        ]
+        for name, stats in summary['endpoints'].items():
+            labels = f'run="{run}",endpoint="{name}"'
+            for bound, count in stats['latency_buckets'].items():
+                lines.append(f'nba_scrape_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'nba_scrape_request_duration_seconds_sum{{{labels}}} {stats["latency_sum"]:.6f}')
+            lines.append(f'nba_scrape_request_duration_seconds_count{{{labels}}} {stats["requests"] + stats["errors"]}')
+
+        counters = [
+            ('nba_scrape_response_bytes_total', 'Response bytes received per endpoint.', 'bytes'),
+            ('nba_scrape_retries_total', 'Retried attempts per endpoint.', 'retries'),
+            ('nba_scrape_errors_total', 'Requests that failed after all retries.', 'errors'),
+        ]
+        for metric, help_text, field in counters:
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} counter')
+            for name, stats in summary['endpoints'].items():
+                lines.append(f'{metric}{{run="{run}",endpoint="{name}"}} {stats[field]}')
+
+        lines.append('# HELP nba_scrape_responses_total Responses per endpoint and status code.')
+        lines.append('# TYPE nba_scrape_responses_total counter')
+        for name, stats in summary['endpoints'].items():
+            for status, count in stats['statuses'].items():
+                lines.append(f'nba_scrape_responses_total{{run="{run}",endpoint="{name}",status="{status}"}} {count}')
+
+        lines.append('# HELP nba_scrape_cache_total Cache lookups per endpoint and result.')
+        lines.append('# TYPE nba_scrape_cache_total counter')
+        for name, stats in summary['endpoints'].items():
+            for result, count in sorted(stats['cache'].items()):
+                lines.append(f'nba_scrape_cache_total{{run="{run}",endpoint="{name}",result="{result}"}} {count}')
+
+        lines.append('# HELP nba_scrape_run_duration_seconds Wall time of the run.')
+        lines.append('# TYPE nba_scrape_run_duration_seconds gauge')
+        lines.append(f'nba_scrape_run_duration_seconds{{run="{run}"}} {summary["elapsed_seconds"]:.3f}')
+        return '\n'.join(lines) + '\n'
+
+    def write_summary(self, run_name, directory=None):
+        """寫入本次執行的摘要：<執行名稱>_<時間>.json 保留每次的紀錄，<執行名稱>.prom 只保留最新一次"""
+        directory = directory or telemetry_dir
+        os.makedirs(directory, exist_ok=True)
+        summary = self.summary(run_name)
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(self.started_at))
+        json_path = os.path.join(directory, f'{run_name}_{stamp}.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=4)
+        prom_path = os.path.join(directory, f'{run_name}.prom')
+        tmp_path = prom_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus(summary))
+        os.replace(tmp_path, prom_path)
+
+        print(f"遙測摘要：{summary['requests']} 個請求，{summary['bytes'] / 1024:.0f} KB，"
+              f"耗時 {summary['elapsed_seconds']:.1f} 秒，已寫入 {json_path}")
+        return summary
+
+_telemetry = Telemetry()
+
+# 函數：取得共用的遙測資料
+def get_telemetry():
+    return _telemetry
+
+# 函數：寫入本次執行的遙測摘要
+def write_summary(run_name):
+    return _telemetry.write_summary(run_name)
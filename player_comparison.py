@@ -1,30 +1,146 @@
-import json
 import os
-import matplotlib.pyplot as plt
-import pandas as pd
-import numpy as np
 import sys
-import matplotlib
-import re
-from bs4 import BeautifulSoup
 
-# 設置通用字體
-try:
-    matplotlib.rcParams['font.family'] = ['Arial', 'sans-serif']
-    matplotlib.rcParams['axes.unicode_minus'] = False
-    print('已設置通用字體支援')
-except:
-    print('警告：設置字體失敗，圖表中的文字可能無法正確顯示')
+from nba_archive import load_payload
+from nba_charts import (ChartTemplate, chart_extension, chart_options, charts_enabled, render_charts, rescale,
+                        set_category_ticks)
+from nba_layout import comparison_output, player_exists, player_path, register_comparison
+from nba_league_stats import league_player_name, load_league_player_stats
+from nba_profile import parse_profile
+from nba_storage import load_record, load_table_set
 
-# 確保存儲分析結果的目錄存在
-if not os.path.exists('nba_player_comparison'):
-    os.makedirs('nba_player_comparison')
+# pandas、numpy 與 matplotlib 在比較與繪圖時才匯入；比較結果的目錄在寫入時才建立 (comparison_output)
+
+# 圖表字體：繪圖時由圖表引擎套用（包含繪圖程序池中的每個程序）
+chart_style = {
+    'font.family': ['Arial', 'sans-serif'],
+    'axes.unicode_minus': False,
+}
+
+# 繪製比較圖表到分片目錄，並登記到比較結果索引
+# charts 為 (名稱, 圖表範本, 參數) 的列表，互不相關的圖表分散到多個程序同時繪製；回傳成功的圖表名稱
+def render_comparison_charts(player1_id, player2_id, charts):
+    names = {}
+    jobs = []
+    for name, plot, args in charts:
+        path_base = comparison_output(player1_id, player2_id, name)
+        names[path_base] = name
+        jobs.append((path_base, plot, args))
+    rendered = []
+    for path_base, path in render_charts(jobs, style=chart_style).items():
+        if path:
+            register_comparison(player1_id, player2_id, names[path_base] + chart_extension())
+            rendered.append(names[path_base])
+    return rendered
+
+# 生涯數據柱狀對比圖
+class CareerBarsChart(ChartTemplate):
+    figsize = (12, 8)
+    labels = ['Points', 'Assists', 'Rebounds', 'Steals', 'Blocks']
+
+    def build(self, ax):
+        import numpy as np
+
+        x = np.arange(len(self.labels))
+        width = 0.35
+        self.rects1 = ax.bar(x - width/2, [0] * len(x), width, label=' ')
+        self.rects2 = ax.bar(x + width/2, [0] * len(x), width, label=' ')
+        
+        # 添加標籤和標題
+        ax.set_ylabel('Career Averages')
+        ax.set_title('Career Stats Comparison')
+        ax.set_xticks(x)
+        ax.set_xticklabels(self.labels)
+        
+        # 每個柱子上的數值標籤
+        self.annotations = [
+            ax.annotate('', xy=(rect.get_x() + rect.get_width()/2, 0), xytext=(0, 3),
+                        textcoords="offset points", ha='center', va='bottom')
+            for rect in list(self.rects1) + list(self.rects2)
+        ]
+
+    def update(self, player1_values, player2_values, player1_name, player2_name):
+        rects = list(self.rects1) + list(self.rects2)
+        for rect, annotation, height in zip(rects, self.annotations, list(player1_values) + list(player2_values)):
+            rect.set_height(height)
+            annotation.xy = (rect.get_x() + rect.get_width()/2, height)
+            annotation.set_text('{:.1f}'.format(height))
+        self.rects1.set_label(player1_name)
+        self.rects2.set_label(player2_name)
+        self.ax.legend()
+        rescale(self.ax)
+
+# 能力雷達對比圖（數值已正規化到 0-100）
+class CareerRadarChart(ChartTemplate):
+    figsize = (10, 10)
+    polar = True
+    labels = ['Points', 'Assists', 'Rebounds', 'Steals', 'Blocks', 'FG%', '3P%', 'FT%']
+
+    def build(self, ax):
+        import numpy as np
+
+        angles = np.linspace(0, 2*np.pi, len(self.labels), endpoint=False).tolist()
+        self.angles = angles + [angles[0]]  # 閉合雷達圖
+        zeros = [0] * len(self.angles)
+        
+        self.line1, = ax.plot(self.angles, zeros, 'b-', linewidth=2)
+        self.area1, = ax.fill(self.angles, zeros, 'b', alpha=0.1)
+        self.line2, = ax.plot(self.angles, zeros, 'r-', linewidth=2)
+        self.area2, = ax.fill(self.angles, zeros, 'r', alpha=0.1)
+        
+        # 設置標籤和角度
+        ax.set_thetagrids(np.degrees(angles), self.labels)
+        ax.set_ylim(0, 100)
+        self.title = ax.set_title('', fontsize=15, y=1.1)
+
+    def update(self, player1_radar, player2_radar, player1_name, player2_name):
+        import numpy as np
+
+        # 閉合雷達圖
+        player1_radar = list(player1_radar) + [player1_radar[0]]
+        player2_radar = list(player2_radar) + [player2_radar[0]]
+        
+        self.line1.set_data(self.angles, player1_radar)
+        self.area1.set_xy(np.column_stack([self.angles, player1_radar]))
+        self.line2.set_data(self.angles, player2_radar)
+        self.area2.set_xy(np.column_stack([self.angles, player2_radar]))
+        self.line1.set_label(player1_name)
+        self.line2.set_label(player2_name)
+        self.title.set_text(f'{player1_name} vs {player2_name} - Radar Comparison')
+        
+        # 顯示圖例
+        self.ax.legend(loc='upper right')
+
+# 單一數據的賽季趨勢對比圖
+class SeasonTrendChart(ChartTemplate):
+    figsize = (12, 8)
+
+    def build(self, ax):
+        self.line1, = ax.plot([], [], 'b-o', linewidth=2)
+        self.line2, = ax.plot([], [], 'r-o', linewidth=2)
+        self.title = ax.set_title('', fontsize=16)
+        ax.set_xlabel('Season', fontsize=14)
+        self.ylabel = ax.set_ylabel('', fontsize=14)
+        ax.grid(True, linestyle='--', alpha=0.7)
+
+    def update(self, player1_seasons, player2_seasons, stat, label, player1_name, player2_name):
+        # 兩位球員的賽季合併後排序作為 X 軸
+        seasons = sorted(set(player1_seasons['SEASON_ID']) | set(player2_seasons['SEASON_ID']))
+        positions = set_category_ticks(self.ax, seasons)
+        for line, seasons_df, name in ((self.line1, player1_seasons, player1_name),
+                                       (self.line2, player2_seasons, player2_name)):
+            line.set_data([positions[season] for season in seasons_df['SEASON_ID']], seasons_df[stat])
+            line.set_label(name)
+        
+        self.title.set_text(f'{label} Per Game Comparison: {player1_name} vs {player2_name}')
+        self.ylabel.set_text(f'{label} Per Game')
+        self.ax.legend()
+        rescale(self.ax)
 
 # 載入球員統計數據
 def load_player_stats(player_id):
     player_id = str(player_id)  # 確保ID是字符串類型
-    stats_file = f'nba_player_data/player_{player_id}_stats.json'
-    print(f'嘗試載入球員統計數據文件: {stats_file}')
+    print(f'嘗試載入球員統計數據: {player_id}')
     
     # 備用數據（用於測試）
     fallback_stats = {
@@ -54,24 +170,28 @@ def load_player_stats(player_id):
         }
     }
     
-    try:
-        with open(stats_file, 'r', encoding='utf-8') as f:
-            stats = json.load(f)
-            print(f'成功載入球員 {player_id} 的統計數據')
-            return stats
-    except Exception as e:
-        print(f'無法載入球員 {player_id} 的統計數據: {e}')
-        # 如果是我們有備用數據的球員，返回備用數據
-        if player_id in fallback_stats:
-            print(f'使用 {player_id} 的備用統計數據')
-            return fallback_stats[player_id]
-        return None
+    stats = load_table_set(player_path(player_id, 'stats')) if player_exists(player_id, 'stats') else None
+    if stats:
+        print(f'成功載入球員 {player_id} 的統計數據')
+        return stats
+    
+    # 沒有單一球員的數據檔案時，改用聯盟賽季數據
+    stats = load_league_player_stats(player_id)
+    if stats:
+        print(f'使用聯盟賽季數據作為球員 {player_id} 的統計數據')
+        return stats
+
+    print(f'無法載入球員 {player_id} 的統計數據')
+    # 如果是我們有備用數據的球員，返回備用數據
+    if player_id in fallback_stats:
+        print(f'使用 {player_id} 的備用統計數據')
+        return fallback_stats[player_id]
+    return None
 
 # 載入球員基本資訊
 def load_player_info(player_id):
     player_id = str(player_id)  # 確保ID是字符串類型
-    info_file = f'nba_player_data/player_{player_id}_info.json'
-    print(f'嘗試載入球員信息文件: {info_file}')
+    print(f'嘗試載入球員信息: {player_id}')
     
     # 為常見球員ID提供預設名稱映射
     default_names = {
@@ -93,119 +213,94 @@ def load_player_info(player_id):
         '203081': 'Damian Lillard'
     }
     
-    # 從HTML檔案中提取球員名稱的函數
-    def extract_name_from_html(file_path):
+    # 從儲存的球員頁面取得名稱（使用頁面嵌入的 Next.js 資料）
+    def extract_name_from_html():
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-                
-            # 使用BeautifulSoup解析HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # 嘗試不同的選擇器找到球員名稱
-            # 1. 嘗試找標準的球員名稱元素
-            player_name_elem = soup.select_one('h1.PlayerSummary_playerNameText__K7ZXO')
-            if player_name_elem:
-                return player_name_elem.text.strip()
-            
-            # 2. 嘗試找一般的標題
-            h1_elems = soup.find_all('h1')
-            for h1 in h1_elems:
-                # 如果標題中有球員ID，很可能是球員名稱
-                if player_id in h1.get('id', '') or 'player' in h1.get('class', [''])[0].lower():
-                    return h1.text.strip()
-            
-            # 3. 嘗試通過頁面標題提取
-            title = soup.find('title')
-            if title:
-                title_text = title.text.strip()
-                # 如果標題包含 "| NBA.com"，提取前面部分
-                if '|' in title_text:
-                    return title_text.split('|')[0].strip()
-            
-            # 如果所有方法都失敗，使用正則表達式尋找
-            patterns = [
-                r'<h1[^>]*>([^<]+)</h1>',
-                r'<div[^>]*class="[^"]*player-name[^"]*"[^>]*>([^<]+)</div>',
-                r'player name: "([^"]+)"',
-                r'playerName: "([^"]+)"'
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, html_content, re.IGNORECASE)
-                if matches:
-                    return matches[0].strip()
-                    
-            return None
+            html = load_payload('player_profile', player_id)
+            if html is None:
+                return None
+            profile = parse_profile(html.decode('utf-8', errors='replace'))
+            return profile.name if profile is not None else None
         except Exception as e:
             print(f'從HTML提取名稱時發生錯誤: {e}')
             return None
     
     # 直接從info.json中提取名稱，如果失敗則使用預設名稱
     try:
-        with open(info_file, 'r', encoding='utf-8') as f:
-            player_info = json.load(f)
-            print(f'載入了球員 {player_id} 的資訊: {player_info}')
-            
-            # 嘗試從不同欄位中獲取有效名稱
-            if 'name' in player_info and player_info['name'] != 'N/A':
-                print(f'使用資訊檔案中的名稱: {player_info["name"]}')
-                return player_info
-            elif 'DISPLAY_FIRST_LAST' in player_info:
-                player_info['name'] = player_info['DISPLAY_FIRST_LAST']
-                print(f'使用DISPLAY_FIRST_LAST作為名稱: {player_info["name"]}')
-                return player_info
-            elif player_id in default_names:
-                player_info['name'] = default_names[player_id]
-                print(f'使用預設名稱: {player_info["name"]}')
-                return player_info
-            else:
-                # 從html檔案嘗試提取名稱
-                html_file = f'nba_player_data/player_{player_id}_profile.html'
-                if os.path.exists(html_file):
-                    player_name = extract_name_from_html(html_file)
-                    if player_name:
-                        player_info['name'] = player_name
-                        print(f'從HTML提取球員名稱: {player_name}')
-                        return player_info
-                
-                # 如果所有方法都失敗，使用ID作為名稱
-                player_info['name'] = f'Player {player_id}'
-                print(f'使用ID作為名稱: {player_info["name"]}')
+        if not player_exists(player_id, 'info'):
+            raise FileNotFoundError(f'找不到球員 {player_id} 的資訊')
+        player_info = load_record(player_path(player_id, 'info'))
+        print(f'載入了球員 {player_id} 的資訊: {player_info}')
+        
+        # 嘗試從不同欄位中獲取有效名稱
+        if player_info.get('name') not in (None, '', 'N/A'):
+            print(f'使用資訊檔案中的名稱: {player_info["name"]}')
+            return player_info
+        elif 'DISPLAY_FIRST_LAST' in player_info:
+            player_info['name'] = player_info['DISPLAY_FIRST_LAST']
+            print(f'使用DISPLAY_FIRST_LAST作為名稱: {player_info["name"]}')
+            return player_info
+        elif player_id in default_names:
+            player_info['name'] = default_names[player_id]
+            print(f'使用預設名稱: {player_info["name"]}')
+            return player_info
+        else:
+            # 從封存的個人資料頁嘗試提取名稱
+            player_name = extract_name_from_html()
+            if player_name:
+                player_info['name'] = player_name
+                print(f'從HTML提取球員名稱: {player_name}')
                 return player_info
+            
+            # 如果所有方法都失敗，使用ID作為名稱
+            player_info['name'] = f'Player {player_id}'
+            print(f'使用ID作為名稱: {player_info["name"]}')
+            return player_info
     except Exception as e:
         print(f'無法載入球員 {player_id} 的基本資訊: {e}')
         
+        # 如果有聯盟賽季數據，使用其中的球員名稱
+        league_name = league_player_name(load_league_player_stats(player_id))
+        if league_name:
+            print(f'使用聯盟數據中的名稱: {league_name}')
+            return {'name': league_name}
+        
         # 如果有預設名稱，使用預設名稱
         if player_id in default_names:
             print(f'使用預設名稱: {default_names[player_id]}')
             return {'name': default_names[player_id]}
         
-        # 嘗試使用HTML檔案
-        html_file = f'nba_player_data/player_{player_id}_profile.html'
-        if os.path.exists(html_file):
-            player_name = extract_name_from_html(html_file)
-            if player_name:
-                print(f'從HTML提取球員名稱: {player_name}')
-                return {'name': player_name}
+        # 嘗試使用封存的個人資料頁
+        player_name = extract_name_from_html()
+        if player_name:
+            print(f'從HTML提取球員名稱: {player_name}')
+            return {'name': player_name}
         
         # 如果所有方法都失敗，使用ID
         print(f'無法獲取名稱，使用ID: Player {player_id}')
         return {'name': f'Player {player_id}'}
 
+# 函數：檢查呼叫者提供的球員資訊是否有可用的名稱，沒有時回傳 None（改為從磁碟載入並推斷名稱）
+def usable_info(player_info):
+    if player_info and player_info.get('name') not in (None, '', 'N/A'):
+        return player_info
+    return None
+
 # 比較兩名球員的生涯平均數據
-def compare_career_averages(player1_id, player2_id):
+# 可以直接傳入已在記憶體中的統計數據與基本資訊（例如剛爬取的結果），省略時從磁碟載入
+def compare_career_averages(player1_id, player2_id, player1_stats=None, player2_stats=None,
+                            player1_info=None, player2_info=None):
+    import pandas as pd
+
     # 確保ID是字符串類型
     player1_id = str(player1_id)
     player2_id = str(player2_id)
     
-    # 載入球員1的數據
-    player1_stats = load_player_stats(player1_id)
-    player1_info = load_player_info(player1_id)
-    
-    # 載入球員2的數據
-    player2_stats = load_player_stats(player2_id)
-    player2_info = load_player_info(player2_id)
+    # 載入球員的數據（呼叫者已經在記憶體中提供的不再從磁碟載入）
+    player1_stats = player1_stats or load_player_stats(player1_id)
+    player1_info = usable_info(player1_info) or load_player_info(player1_id)
+    player2_stats = player2_stats or load_player_stats(player2_id)
+    player2_info = usable_info(player2_info) or load_player_info(player2_id)
     
     if not player1_stats or not player2_stats:
         print('無法比較生涯平均數據，缺少必要數據')
@@ -228,47 +323,13 @@ def compare_career_averages(player1_id, player2_id):
         
         # 創建數據對比圖 - 主要統計數據比較
         categories = ['PTS', 'AST', 'REB', 'STL', 'BLK']
-        labels = ['Points', 'Assists', 'Rebounds', 'Steals', 'Blocks']
         
         # 獲取數據
         player1_values = [player1_career.iloc[0][cat] for cat in categories]
         player2_values = [player2_career.iloc[0][cat] for cat in categories]
         
-        # 創建柱狀圖
-        x = np.arange(len(categories))
-        width = 0.35
-        
-        fig, ax = plt.subplots(figsize=(12, 8))
-        rects1 = ax.bar(x - width/2, player1_values, width, label=player1_name)
-        rects2 = ax.bar(x + width/2, player2_values, width, label=player2_name)
-        
-        # 添加標籤和標題
-        ax.set_ylabel('Career Averages')
-        ax.set_title('Career Stats Comparison')
-        ax.set_xticks(x)
-        ax.set_xticklabels(labels)
-        ax.legend()
-        
-        # 為每個柱子添加數值標籤
-        def autolabel(rects):
-            for rect in rects:
-                height = rect.get_height()
-                ax.annotate('{:.1f}'.format(height),
-                            xy=(rect.get_x() + rect.get_width()/2, height),
-                            xytext=(0, 3),
-                            textcoords="offset points",
-                            ha='center', va='bottom')
-        
-        autolabel(rects1)
-        autolabel(rects2)
-        
-        plt.tight_layout()
-        plt.savefig(f'nba_player_comparison/{player1_id}_vs_{player2_id}_career_stats.png', dpi=300)
-        print(f'已保存 {player1_name} 和 {player2_name} 的生涯數據對比圖')
-        
         # 創建雷達圖 - 多維度數據對比
         categories = ['PTS', 'AST', 'REB', 'STL', 'BLK', 'FG_PCT', 'FG3_PCT', 'FT_PCT']
-        labels = ['Points', 'Assists', 'Rebounds', 'Steals', 'Blocks', 'FG%', '3P%', 'FT%']
         
         # 獲取數據並正規化
         max_values = {
@@ -279,34 +340,16 @@ def compare_career_averages(player1_id, player2_id):
         player1_radar = [min(player1_career.iloc[0][cat] / max_values[cat] * 100, 100) if cat in player1_career.columns else 0 for cat in categories]
         player2_radar = [min(player2_career.iloc[0][cat] / max_values[cat] * 100, 100) if cat in player2_career.columns else 0 for cat in categories]
         
-        # 繪製雷達圖
-        angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False).tolist()
-        
-        # 閉合雷達圖
-        player1_radar += [player1_radar[0]]
-        player2_radar += [player2_radar[0]]
-        angles += [angles[0]]
-        labels += [labels[0]]
-        
-        fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(polar=True))
-        
-        ax.plot(angles, player1_radar, 'b-', linewidth=2, label=player1_name)
-        ax.fill(angles, player1_radar, 'b', alpha=0.1)
-        
-        ax.plot(angles, player2_radar, 'r-', linewidth=2, label=player2_name)
-        ax.fill(angles, player2_radar, 'r', alpha=0.1)
-        
-        # 設置標籤和角度
-        ax.set_thetagrids(np.degrees(angles[:-1]), labels[:-1])
-        ax.set_ylim(0, 100)
-        ax.set_title(f'{player1_name} vs {player2_name} - Radar Comparison', fontsize=15, y=1.1)
-        
-        # 顯示圖例
-        ax.legend(loc='upper right')
-        
-        plt.tight_layout()
-        plt.savefig(f'nba_player_comparison/{player1_id}_vs_{player2_id}_radar.png', dpi=300)
-        print(f'已保存 {player1_name} 和 {player2_name} 的能力雷達對比圖')
+        # 生涯數據柱狀對比圖與能力雷達對比圖同時繪製
+        charts = [
+            ('career_stats', CareerBarsChart, (player1_values, player2_values, player1_name, player2_name)),
+            ('radar', CareerRadarChart, (player1_radar, player2_radar, player1_name, player2_name)),
+        ]
+        rendered = render_comparison_charts(player1_id, player2_id, charts)
+        if 'career_stats' in rendered:
+            print(f'已保存 {player1_name} 和 {player2_name} 的生涯數據對比圖')
+        if 'radar' in rendered:
+            print(f'已保存 {player1_name} 和 {player2_name} 的能力雷達對比圖')
         
         # 生成對比報告
         create_comparison_report(player1_id, player2_id, player1_info, player2_info, player1_career, player2_career)
@@ -314,19 +357,20 @@ def compare_career_averages(player1_id, player2_id):
     except Exception as e:
         print(f'比較生涯平均數據時出現錯誤: {e}')
 
-# 比較兩名球員的賽季表現
-def compare_season_trends(player1_id, player2_id):
+# 比較兩名球員的賽季表現（參數與 compare_career_averages 相同）
+def compare_season_trends(player1_id, player2_id, player1_stats=None, player2_stats=None,
+                          player1_info=None, player2_info=None):
+    import pandas as pd
+
     # 確保ID是字符串類型
     player1_id = str(player1_id)
     player2_id = str(player2_id)
     
-    # 載入球員1的數據
-    player1_stats = load_player_stats(player1_id)
-    player1_info = load_player_info(player1_id)
-    
-    # 載入球員2的數據
-    player2_stats = load_player_stats(player2_id)
-    player2_info = load_player_info(player2_id)
+    # 載入球員的數據（呼叫者已經在記憶體中提供的不再從磁碟載入）
+    player1_stats = player1_stats or load_player_stats(player1_id)
+    player1_info = usable_info(player1_info) or load_player_info(player1_id)
+    player2_stats = player2_stats or load_player_stats(player2_id)
+    player2_info = usable_info(player2_info) or load_player_info(player2_id)
     
     if not player1_stats or not player2_stats:
         print('無法比較賽季趨勢，缺少必要數據')
@@ -354,36 +398,16 @@ def compare_season_trends(player1_id, player2_id):
         if 'SEASON_ID' in player2_seasons.columns:
             player2_seasons = player2_seasons.sort_values('SEASON_ID')
         
-        # 繪製得分趨勢對比圖
-        if 'PTS' in player1_seasons.columns and 'PTS' in player2_seasons.columns:
-            plt.figure(figsize=(12, 8))
-            plt.plot(player1_seasons['SEASON_ID'], player1_seasons['PTS'], 'b-o', linewidth=2, label=player1_name)
-            plt.plot(player2_seasons['SEASON_ID'], player2_seasons['PTS'], 'r-o', linewidth=2, label=player2_name)
-            
-            plt.title(f'Points Per Game Comparison: {player1_name} vs {player2_name}', fontsize=16)
-            plt.xlabel('Season', fontsize=14)
-            plt.ylabel('Points Per Game', fontsize=14)
-            plt.legend()
-            plt.grid(True, linestyle='--', alpha=0.7)
-            plt.tight_layout()
-            plt.savefig(f'nba_player_comparison/{player1_id}_vs_{player2_id}_pts_trend.png', dpi=300)
-            print(f'已保存 {player1_name} 和 {player2_name} 的得分趨勢對比圖')
-        
-        # 繪製其他數據趨勢對比圖（助攻、籃板等）
-        for stat, label in [('AST', 'Assists'), ('REB', 'Rebounds')]:
+        # 得分、助攻、籃板的趨勢對比圖同時繪製
+        charts = []
+        trend_labels = {}
+        for stat, label in [('PTS', 'Points'), ('AST', 'Assists'), ('REB', 'Rebounds')]:
             if stat in player1_seasons.columns and stat in player2_seasons.columns:
-                plt.figure(figsize=(12, 8))
-                plt.plot(player1_seasons['SEASON_ID'], player1_seasons[stat], 'b-o', linewidth=2, label=player1_name)
-                plt.plot(player2_seasons['SEASON_ID'], player2_seasons[stat], 'r-o', linewidth=2, label=player2_name)
-                
-                plt.title(f'{label} Per Game Comparison: {player1_name} vs {player2_name}', fontsize=16)
-                plt.xlabel('Season', fontsize=14)
-                plt.ylabel(f'{label} Per Game', fontsize=14)
-                plt.legend()
-                plt.grid(True, linestyle='--', alpha=0.7)
-                plt.tight_layout()
-                plt.savefig(f'nba_player_comparison/{player1_id}_vs_{player2_id}_{stat.lower()}_trend.png', dpi=300)
-                print(f'已保存 {player1_name} 和 {player2_name} 的{label}趨勢對比圖')
+                trend_labels[f'{stat.lower()}_trend'] = label
+                charts.append((f'{stat.lower()}_trend', SeasonTrendChart,
+                               (player1_seasons, player2_seasons, stat, label, player1_name, player2_name)))
+        for name in render_comparison_charts(player1_id, player2_id, charts):
+            print(f'已保存 {player1_name} 和 {player2_name} 的{trend_labels[name]}趨勢對比圖')
         
     except Exception as e:
         print(f'比較賽季趨勢時出現錯誤: {e}')
@@ -442,32 +466,36 @@ def create_comparison_report(player1_id, player2_id, player1_info, player2_info,
         except:
             pass
     
-    # 添加圖表說明
-    report += f'''
+    # 添加圖表說明（沒有繪製圖表時省略）
+    if charts_enabled():
+        ext = chart_extension()
+        report += f'''
 
 附上對比圖表:
-1. {player1_id}_vs_{player2_id}_career_stats.png - 生涯數據柱狀對比圖
-2. {player1_id}_vs_{player2_id}_radar.png - 能力雷達對比圖
-3. {player1_id}_vs_{player2_id}_pts_trend.png - 得分趨勢對比圖
-4. {player1_id}_vs_{player2_id}_ast_trend.png - 助攻趨勢對比圖
-5. {player1_id}_vs_{player2_id}_reb_trend.png - 籃板趨勢對比圖
+1. {player1_id}_vs_{player2_id}_career_stats{ext} - 生涯數據柱狀對比圖
+2. {player1_id}_vs_{player2_id}_radar{ext} - 能力雷達對比圖
+3. {player1_id}_vs_{player2_id}_pts_trend{ext} - 得分趨勢對比圖
+4. {player1_id}_vs_{player2_id}_ast_trend{ext} - 助攻趨勢對比圖
+5. {player1_id}_vs_{player2_id}_reb_trend{ext} - 籃板趨勢對比圖
 '''
     
     # 保存報告到文件
-    with open(f'nba_player_comparison/{player1_id}_vs_{player2_id}_report.txt', 'w', encoding='utf-8') as f:
+    with open(comparison_output(player1_id, player2_id, 'report.txt'), 'w', encoding='utf-8') as f:
         f.write(report)
+    register_comparison(player1_id, player2_id, 'report.txt')
     
     print(f'已生成 {player1_name} 和 {player2_name} 的對比分析報告')
     return report
 
 # 主函數
 def main():
+    args = chart_options(sys.argv[1:])
     # 檢查命令行參數或提示用戶輸入
-    if len(sys.argv) > 2:
-        player1_id = str(sys.argv[1])
-        player2_id = str(sys.argv[2])
+    if len(args) > 1:
+        player1_id = str(args[0])
+        player2_id = str(args[1])
     else:
-        print("用法: python player_comparison.py <球員1 ID> <球員2 ID>")
+        print("用法: python player_comparison.py <球員1 ID> <球員2 ID> [--profile=draft|preview|print|svg] [--no-charts]")
         player1_id = str(input('請輸入第一位球員 ID: '))
         player2_id = str(input('請輸入第二位球員 ID: '))
     
@@ -479,21 +507,17 @@ def main():
         return
     
     # 檢查球員數據是否存在
-    player1_stats_file = f'nba_player_data/player_{player1_id}_stats.json'
-    player1_info_file = f'nba_player_data/player_{player1_id}_info.json'
-    player2_stats_file = f'nba_player_data/player_{player2_id}_stats.json'
-    player2_info_file = f'nba_player_data/player_{player2_id}_info.json'
-    
-    print(f'檢查文件: {player1_stats_file}, {player1_info_file}')
-    print(f'檢查文件: {player2_stats_file}, {player2_info_file}')
+    for player_id in (player1_id, player2_id):
+        print(f"檢查球員 {player_id}: 統計數據 {'有' if player_exists(player_id, 'stats') else '無'}，"
+              f"基本資訊 {'有' if player_exists(player_id, 'info') else '無'}")
     
-    if not os.path.exists(player1_stats_file) or not os.path.exists(player1_info_file):
+    if not player_exists(player1_id, 'stats') and load_league_player_stats(player1_id) is None:
         print(f'錯誤：請先運行 player_specific_scraper.py 獲取球員 {player1_id} 的數據。')
         # 如果是LeBron James或Kevin Durant，則繼續
         if player1_id not in ['2544', '201142']:
             return
     
-    if not os.path.exists(player2_stats_file) or not os.path.exists(player2_info_file):
+    if not player_exists(player2_id, 'stats') and load_league_player_stats(player2_id) is None:
         print(f'錯誤：請先運行 player_specific_scraper.py 獲取球員 {player2_id} 的數據。')
         # 如果是LeBron James或Kevin Durant，則繼續
         if player2_id not in ['2544', '201142']:
@@ -509,7 +533,11 @@ def main():
     print('\n比較賽季趨勢...')
     compare_season_trends(player1_id, player2_id)
     
-    print(f'\n所有比較結果已保存在 nba_player_comparison 目錄下。')
+    print(f'\n所有比較結果已保存在 {os.path.dirname(comparison_output(player1_id, player2_id, "report.txt"))} 目錄下。')
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    # 封裝成單一執行檔 (PyInstaller --onefile) 時，繪圖程序池的每個程序會重新啟動這個執行檔，
+    # freeze_support 讓這些程序只執行繪圖工作，不會重新執行主程式
+    from multiprocessing import freeze_support
+    freeze_support()
+    main()
@@ -1,47 +1,47 @@
-import json
 import os
-import matplotlib.pyplot as plt
-import pandas as pd
-import numpy as np
 import sys
-import matplotlib
 
-# 設置中文字體
-try:
-    # 使用通用字體
-    matplotlib.rcParams['font.family'] = ['Arial', 'sans-serif']
-    # 解決保存圖像時負號'-'顯示為方塊的問題
-    matplotlib.rcParams['axes.unicode_minus'] = False
-    print('已設置通用字體支援')
-except:
-    print('警告：設置字體失敗，圖表中的中文可能無法正確顯示')
+from nba_charts import (ChartTemplate, chart_extension, chart_options, charts_enabled, render_charts, rescale,
+                        set_category_ticks)
+from nba_league_stats import league_player_name, load_league_player_stats
+from nba_layout import player_exists, player_path
+from nba_storage import load_record, load_table_set
 
-# 确保存储分析结果的目录存在
-if not os.path.exists('nba_player_analysis'):
-    os.makedirs('nba_player_analysis')
+# pandas、numpy 与 matplotlib 在分析与绘图时才导入，导入这个模块不会创建目录或修改 matplotlib 设置
 
-# 加载球员统计数据
+# 分析结果的目录（写入时才创建）
+analysis_dir = 'nba_player_analysis'
+
+# 圖表字體：使用通用字體，並解決保存圖像時負號'-'顯示為方塊的問題
+# 繪圖時由圖表引擎套用（包含繪圖程序池中的每個程序）
+chart_style = {
+    'font.family': ['Arial', 'sans-serif'],
+    'axes.unicode_minus': False,
+}
+
+# 函数：取得分析结果的路径（会创建目录）
+def analysis_output(name):
+    os.makedirs(analysis_dir, exist_ok=True)
+    return os.path.join(analysis_dir, name)
+
+# 加载球员统计数据（各个 resultSet 为 DataFrame）
+# 没有单一球员的数据文件时，改用联盟赛季数据 (nba_league_stats.py)
 def load_player_stats(player_id):
-    stats_file = f'nba_player_data/player_{player_id}_stats.json'
-    try:
-        with open(stats_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f'无法加载球员统计数据: {e}')
-        return None
+    if player_exists(player_id, 'stats'):
+        return load_table_set(player_path(player_id, 'stats'))
+    stats = load_league_player_stats(player_id)
+    if stats is not None:
+        print(f'使用联盟赛季数据分析球员 {player_id}')
+    return stats
 
 # 加载球员信息
 def load_player_info(player_id):
-    info_file = f'nba_player_data/player_{player_id}_info.json'
-    try:
-        with open(info_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f'无法加载球员信息: {e}')
-        return None
+    return load_record(player_path(player_id, 'info'))
 
 # 分析职业平均数据
 def analyze_career_averages(stats):
+    import pandas as pd
+
     if not stats or 'CareerTotalsRegularSeason' not in stats:
         print('无法分析职业平均数据，缺少必要数据')
         return None
@@ -59,8 +59,88 @@ def analyze_career_averages(stats):
         print(f'分析职业平均数据时出现错误: {e}')
         return None
 
+# 平均得分趨勢圖
+class PtsTrendChart(ChartTemplate):
+    def build(self, ax):
+        self.line, = ax.plot([], [], 'b-o', linewidth=2)
+        self.title = ax.set_title('', fontsize=16)
+        ax.set_xlabel('Season', fontsize=14)
+        ax.set_ylabel('Points Per Game', fontsize=14)
+        ax.grid(True, linestyle='--', alpha=0.7)
+
+    def update(self, season_stats, player_name):
+        # 每一列對應到所屬賽季的位置（季中被交易的球員同一賽季有多列）
+        positions = set_category_ticks(self.ax, season_stats['SEASON_ID'])
+        self.line.set_data([positions[season] for season in season_stats['SEASON_ID']], season_stats['PTS'])
+        self.title.set_text(f'{player_name} Points Per Game Trend')
+        rescale(self.ax)
+
+# 平均得分、助攻、籃板的對比圖
+class StatsComparisonChart(ChartTemplate):
+    stats = [('PTS', 'b-o', 'Points'), ('AST', 'r-o', 'Assists'), ('REB', 'g-o', 'Rebounds')]
+
+    def build(self, ax):
+        self.lines = [ax.plot([], [], style, label=label)[0] for stat, style, label in self.stats]
+        self.title = ax.set_title('', fontsize=16)
+        ax.set_xlabel('Season', fontsize=14)
+        ax.set_ylabel('Stats Per Game', fontsize=14)
+        ax.legend()
+        ax.grid(True, linestyle='--', alpha=0.7)
+
+    def update(self, season_stats, player_name):
+        positions = set_category_ticks(self.ax, season_stats['SEASON_ID'])
+        x = [positions[season] for season in season_stats['SEASON_ID']]
+        for line, (stat, style, label) in zip(self.lines, self.stats):
+            line.set_data(x, season_stats[stat])
+        self.title.set_text(f'{player_name} Stats Comparison')
+        rescale(self.ax)
+
+# 最近一年的雷達圖
+class RadarChart(ChartTemplate):
+    figsize = (8, 8)
+    polar = True
+    # 繪製雷達圖的各個特性
+    categories = ['Points', 'Assists', 'Rebounds', 'Steals', 'Blocks']
+    stats = ['PTS', 'AST', 'REB', 'STL', 'BLK']
+    # 當前數據與參考數據的對比（以30分、10助攻、15籃板、3搶斷、3蓋帽為參考）
+    reference = [30, 10, 15, 3, 3]  # 得分、助攻、籃板、搶斷、蓋帽的參考高值
+
+    def build(self, ax):
+        import numpy as np
+
+        angles = np.linspace(0, 2*np.pi, len(self.categories), endpoint=False).tolist()
+        self.angles = angles + angles[:1]  # 將第一個角度複製到最後，以形成閉合的多邊形
+        self.line, = ax.plot(self.angles, [0] * len(self.angles), color='C0', linewidth=2, linestyle='solid')
+        self.area, = ax.fill(self.angles, [0] * len(self.angles), color='C0', alpha=0.25)
+        
+        # 設置分割線和標籤
+        ax.set_thetagrids(np.degrees(angles), self.categories)
+        ax.set_ylim(0, 100)
+        self.title = ax.set_title('', fontsize=15, y=1.1)
+        
+        # 每個扇區中的數據值
+        self.labels = [ax.text(angle, 0, '', horizontalalignment='center', verticalalignment='center')
+                       for angle in angles]
+
+    def update(self, recent_season, player_name):
+        import numpy as np
+
+        # 將數據歸一化到0-100之間，以便於比較
+        values = [recent_season[stat] for stat in self.stats]
+        normalized = [min(v / ref * 100, 100) for v, ref in zip(values, self.reference)]
+        closed = normalized + [normalized[0]]  # 將第一個值複製到最後，以形成閉合的多邊形
+        
+        self.line.set_data(self.angles, closed)
+        self.area.set_xy(np.column_stack([self.angles, closed]))
+        for label, angle, value, raw_value in zip(self.labels, self.angles, normalized, values):
+            label.set_position((angle, value + 10))
+            label.set_text(f'{raw_value:.1f}')
+        self.title.set_text(f'{player_name} Recent Season ({recent_season.get("SEASON_ID", "N/A")}) Radar Chart')
+
 # 分析每年表现
 def analyze_season_by_season(stats, player_info, player_id):
+    import pandas as pd
+
     if not stats or 'SeasonTotalsRegularSeason' not in stats:
         print('無法分析每年數據，缺少必要數據')
         return None
@@ -92,31 +172,15 @@ def analyze_season_by_season(stats, player_info, player_id):
         player_name = player_info.get('name', 'Unknown Player') if player_info else 'Unknown Player'
         
         # 分析平均得分趨勢
-        plt.figure(figsize=(12, 6))
+        charts = []
         if 'PTS' in season_stats.columns and 'SEASON_ID' in season_stats.columns:
-            plt.plot(season_stats['SEASON_ID'], season_stats['PTS'], 'b-o', linewidth=2)
-            plt.title(f'{player_name} Points Per Game Trend', fontsize=16)
-            plt.xlabel('Season', fontsize=14)
-            plt.ylabel('Points Per Game', fontsize=14)
-            plt.grid(True, linestyle='--', alpha=0.7)
-            plt.tight_layout()
-            plt.savefig(f'nba_player_analysis/player_{player_id}_pts_trend.png', dpi=300)
-            print(f'已保存球員平均得分趨勢圖')
+            charts.append((analysis_output(f'player_{player_id}_pts_trend'), PtsTrendChart,
+                           (season_stats, player_name)))
         
         # 分析平均得分、助攻、籃板的對比
         if all(col in season_stats.columns for col in ['PTS', 'AST', 'REB', 'SEASON_ID']):
-            plt.figure(figsize=(12, 6))
-            plt.plot(season_stats['SEASON_ID'], season_stats['PTS'], 'b-o', label='Points')
-            plt.plot(season_stats['SEASON_ID'], season_stats['AST'], 'r-o', label='Assists')
-            plt.plot(season_stats['SEASON_ID'], season_stats['REB'], 'g-o', label='Rebounds')
-            plt.title(f'{player_name} Stats Comparison', fontsize=16)
-            plt.xlabel('Season', fontsize=14)
-            plt.ylabel('Stats Per Game', fontsize=14)
-            plt.legend()
-            plt.grid(True, linestyle='--', alpha=0.7)
-            plt.tight_layout()
-            plt.savefig(f'nba_player_analysis/player_{player_id}_stats_comparison.png', dpi=300)
-            print(f'已保存球員數據對比圖')
+            charts.append((analysis_output(f'player_{player_id}_stats_comparison'), StatsComparisonChart,
+                           (season_stats, player_name)))
         
         # 繪製最近一年的雷達圖
         if 'GP' in season_stats.columns:
@@ -124,45 +188,13 @@ def analyze_season_by_season(stats, player_info, player_id):
             recent_season = season_stats[season_stats['GP'] >= 20].iloc[-1] if not season_stats[season_stats['GP'] >= 20].empty else None
             
             if recent_season is not None and all(col in recent_season.index for col in ['PTS', 'AST', 'REB', 'STL', 'BLK']):
-                # 繪製雷達圖的各個特性
-                categories = ['Points', 'Assists', 'Rebounds', 'Steals', 'Blocks']
-                
-                # 最近一年的數據
-                values = [
-                    recent_season['PTS'],
-                    recent_season['AST'],
-                    recent_season['REB'],
-                    recent_season['STL'],
-                    recent_season['BLK']
-                ]
-                
-                # 當前數據與參考數據的對比（以30分、10助攻、15籃板、3搶斷、3蓋帽為參考）
-                # 將數據歸一化到0-100之間，以便於比較
-                reference = [30, 10, 15, 3, 3]  # 得分、助攻、籃板、搶斷、蓋帽的參考高值
-                normalized = [min(v / ref * 100, 100) for v, ref in zip(values, reference)]
-                
-                # 繪製雷達圖
-                angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False).tolist()
-                values = normalized + [normalized[0]]  # 將第一個值複製到最後，以形成閉合的多邊形
-                angles += angles[:1]  # 將第一個角度複製到最後，以形成閉合的多邊形
-                categories += [categories[0]]  # 將第一個類別複製到最後，以形成閉合的多邊形
-                
-                fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
-                ax.plot(angles, values, linewidth=2, linestyle='solid')
-                ax.fill(angles, values, alpha=0.25)
-                
-                # 設置分割線和標籤
-                ax.set_thetagrids(np.degrees(angles[:-1]), categories[:-1])
-                ax.set_ylim(0, 100)
-                ax.set_title(f'{player_name} Recent Season ({recent_season.get("SEASON_ID", "N/A")}) Radar Chart', fontsize=15, y=1.1)
-                
-                # 在每個扇區中添加數據值
-                for i, (angle, value, normalized_value) in enumerate(zip(angles[:-1], values[:-1], [recent_season['PTS'], recent_season['AST'], recent_season['REB'], recent_season['STL'], recent_season['BLK']])):
-                    ax.text(angle, value + 10, f'{normalized_value:.1f}', horizontalalignment='center', verticalalignment='center')
-                
-                plt.tight_layout()
-                plt.savefig(f'nba_player_analysis/player_{player_id}_radar_chart.png', dpi=300)
-                print(f'已保存球員雷達圖')
+                charts.append((analysis_output(f'player_{player_id}_radar_chart'), RadarChart,
+                               (recent_season, player_name)))
+        
+        # 圖表互不相關，分散到多個程序同時繪製
+        for path in render_charts(charts, style=chart_style).values():
+            if path:
+                print(f'已保存圖表: {path}')
         
         return season_stats
     except Exception as e:
@@ -222,27 +254,31 @@ def write_player_report(player_id, player_info, career_stats, season_stats):
     # 添加年份得分趋势
     report += f'\n{season_trends}'
     
-    # 附上图表说明
-    report += f'''
+    # 附上图表说明（没有绘制图表时省略）
+    if charts_enabled():
+        ext = chart_extension()
+        report += f'''
 
 附上图表:
-1. player_{player_id}_pts_trend.png - 得分趋势图
-2. player_{player_id}_stats_comparison.png - 数据对比图
-3. player_{player_id}_radar_chart.png - 数据雷达图
+1. player_{player_id}_pts_trend{ext} - 得分趋势图
+2. player_{player_id}_stats_comparison{ext} - 数据对比图
+3. player_{player_id}_radar_chart{ext} - 数据雷达图
 '''
     
     # 保存报告到文件
-    with open(f'nba_player_analysis/player_{player_id}_report.txt', 'w', encoding='utf-8') as f:
+    with open(analysis_output(f'player_{player_id}_report.txt'), 'w', encoding='utf-8') as f:
         f.write(report)
     
     print(f'已生成球员 {player_name} 的分析报告')
     return report
 
 # 主函数
+# 用法: python player_specific_analyzer.py <球员 ID> [--profile=draft|preview|print|svg] [--no-charts]
 def main():
+    args = chart_options(sys.argv[1:])
     # 检查命令行参数或提示用户输入
-    if len(sys.argv) > 1:
-        player_id = sys.argv[1]
+    if args:
+        player_id = args[0]
     else:
         player_id = input('请输入要分析的球员 ID: ')
     
@@ -251,22 +287,19 @@ def main():
         print('错误：未找到 nba_player_data 目录。请先运行 player_specific_scraper.py 获取球员数据。')
         return
     
-    # 检查球员数据是否存在
-    stats_file = f'nba_player_data/player_{player_id}_stats.json'
-    info_file = f'nba_player_data/player_{player_id}_info.json'
-    
-    if not os.path.exists(stats_file) or not os.path.exists(info_file):
-        print(f'错误：请先运行 player_specific_scraper.py 获取球员 {player_id} 的数据。')
-        return
-    
     # 加载统计数据和球员信息
     stats = load_player_stats(player_id)
-    player_info = load_player_info(player_id)
     
     if not stats:
-        print('无法加载球员统计数据，无法进行分析。')
+        print(f'错误：请先运行 player_specific_scraper.py 或 nba_league_stats.py 获取球员 {player_id} 的数据。')
         return
     
+    if player_exists(player_id, 'info'):
+        player_info = load_player_info(player_id)
+    else:
+        # 只有联盟数据时，使用其中的球员名称
+        player_info = {'name': league_player_name(stats) or f'Player {player_id}'}
+    
     player_name = player_info.get('name', f'Player {player_id}') if player_info else f'Player {player_id}'
     print(f'开始分析 {player_name} 的数据...')
     
@@ -285,4 +318,8 @@ def main():
     print(f'\n所有分析结果已保存在 nba_player_analysis 目录下。')
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    # 封裝成單一執行檔 (PyInstaller --onefile) 時，繪圖程序池的每個程序會重新啟動這個執行檔，
+    # freeze_support 讓這些程序只執行繪圖工作，不會重新執行主程式
+    from multiprocessing import freeze_support
+    freeze_support()
+    main()
@@ -1,17 +1,28 @@
-import requests
 import time
 import json
 import os
 import sys
-from bs4 import BeautifulSoup
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# 創建目錄來儲存爬取的資料
-if not os.path.exists('nba_player_data'):
-    os.makedirs('nba_player_data')
+from nba_archive import archive_file, archive_payload
+from nba_cache import ttl_for
+from nba_html import parse_file, player_summary_strainer
+from nba_http import backoff_delay, http_download, http_get
+from nba_layout import player_exists, player_output, player_path, register_player
+from nba_manifest import get_manifest
+from nba_player_index import get_player_index, normalize_name
+from nba_profile import parse_profile_file
+from nba_resultset import decode_columns, result_sets_by_name
+from nba_storage import save_record, save_table_set
+from nba_telemetry import write_summary
+
+# 儲存資料的目錄 (nba_player_data) 在寫入時才建立，匯入這個模組不會建立目錄
 
 # 基本URL
-base_url = 'https://www.nba.com'
-api_base_url = 'https://stats.nba.com/stats'
+# 可以用環境變數 NBA_BASE_URL / NBA_API_BASE_URL 改為本地的重播伺服器 (nba_replay.py)
+base_url = os.environ.get('NBA_BASE_URL', 'https://www.nba.com')
+api_base_url = os.environ.get('NBA_API_BASE_URL', 'https://stats.nba.com/stats')
 
 # 用於發送請求的標頭
 headers = {
@@ -23,92 +34,94 @@ headers = {
 
 # 函數：搜尋球員
 def search_player(player_name):
-    # 使用 NBA 的搜尋 API 或直接從球員列表中搜尋
+    # 使用本地球員索引搜尋，只有在索引不存在時才會下載球員名單
     try:
         print(f'搜尋球員: {player_name}')
-        player_endpoint = f'commonallplayers?LeagueID=00&Season=2024-25&IsOnlyCurrentSeason=1'
-        response = requests.get(f'{api_base_url}/{player_endpoint}', headers=headers)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if 'resultSets' in data and len(data['resultSets']) > 0:
-                players_data = data['resultSets'][0]
-                headers_list = players_data['headers']
-                player_rows = players_data['rowSet']
-                
-                # 搜尋與所提供名稱相符的球員
-                matching_players = []
-                for player in player_rows:
-                    # 建立球員資料字典
-                    player_dict = {headers_list[i]: player[i] for i in range(len(headers_list))}
-                    # 檢查球員名稱是否包含搜尋詞
-                    if player_name.lower() in player_dict['DISPLAY_FIRST_LAST'].lower():
-                        matching_players.append(player_dict)
-                
-                if matching_players:
-                    print(f'找到 {len(matching_players)} 位符合的球員:')
-                    for i, player in enumerate(matching_players):
-                        print(f"{i+1}. {player['DISPLAY_FIRST_LAST']} (ID: {player['PERSON_ID']})")
-                    return matching_players
-                else:
-                    print(f'找不到球員: {player_name}')
-                    return []
-            else:
-                print('無法解析球員資料')
-                return []
+        index = get_player_index()
+        if index is None:
+            print('無法解析球員資料')
+            return []
+
+        matching_players = index.search(player_name)
+        if matching_players:
+            print(f'找到 {len(matching_players)} 位符合的球員:')
+            for i, player in enumerate(matching_players):
+                print(f"{i+1}. {player['DISPLAY_FIRST_LAST']} (ID: {player['PERSON_ID']})")
+            return matching_players
         else:
-            print(f'搜尋失敗，狀態碼: {response.status_code}')
+            print(f'找不到球員: {player_name}')
             return []
     except Exception as e:
         print(f'搜尋球員時發生錯誤: {e}')
         return []
 
+# 函數：解析球員頁面的 PlayerSummary 區塊（只建立需要的節點）
+def parse_player_summary(html_path):
+    soup = parse_file(html_path, player_summary_strainer())
+    
+    # 解析球員資料 (這部分可能需要根據網頁結構調整)
+    player_info = {}
+    
+    # 嘗試獲取基本資訊
+    try:
+        player_info['name'] = soup.select_one('h1.PlayerSummary_playerNameText__K7ZXO').text.strip()
+    except:
+        player_info['name'] = 'N/A'
+    
+    # 嘗試獲取位置、球隊等其他基本資訊
+    try:
+        info_sections = soup.select('p.PlayerSummary_playerInfoText__JrK0r')
+        for section in info_sections:
+            info_text = section.text.strip()
+            if '|' in info_text:
+                info_parts = info_text.split('|')
+                for part in info_parts:
+                    if ':' in part:
+                        key, value = part.split(':', 1)
+                        player_info[key.strip().lower()] = value.strip()
+    except Exception as e:
+        print(f'獲取基本信息時出錯: {e}')
+    
+    return player_info
+
 # 函數：爬取球員基本資料
 def fetch_player_profile(player_id):
     try:
         profile_url = f'{base_url}/player/{player_id}/profile'
         print(f'爬取球員個人資料頁面: {profile_url}')
         
-        response = requests.get(profile_url, headers=headers)
-        if response.status_code == 200:
-            # 使用 BeautifulSoup 解析 HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 儲存原始 HTML (以便之後分析)
-            with open(f'nba_player_data/player_{player_id}_profile.html', 'w', encoding='utf-8') as f:
-                f.write(soup.prettify())
-            
-            # 解析球員資料 (這部分可能需要根據網頁結構調整)
-            player_info = {}
-            
-            # 嘗試獲取基本資訊
+        # 原始 HTML 邊下載邊寫入暫存檔，解析後壓縮封存到 nba_archive (以便之後重新分析)
+        html_path = player_output(player_id, 'profile') + '.html.part'
+        status_code, _ = http_download(profile_url, html_path, headers=headers)
+        if status_code == 200:
             try:
-                player_info['name'] = soup.select_one('h1.PlayerSummary_playerNameText__K7ZXO').text.strip()
-            except:
-                player_info['name'] = 'N/A'
+                # 從頁面嵌入的 Next.js 資料一次取得完整的個人資料
+                profile = parse_profile_file(html_path)
+                if profile is not None:
+                    player_info = profile.to_dict()
+                else:
+                    # 頁面沒有嵌入資料時，改為解析 PlayerSummary 區塊
+                    player_info = parse_player_summary(html_path)
+                archive_file('player_profile', player_id, html_path)
+            finally:
+                os.remove(html_path)
             
-            # 嘗試獲取位置、球隊等其他基本資訊
-            try:
-                info_sections = soup.select('p.PlayerSummary_playerInfoText__JrK0r')
-                for section in info_sections:
-                    info_text = section.text.strip()
-                    if '|' in info_text:
-                        info_parts = info_text.split('|')
-                        for part in info_parts:
-                            if ':' in part:
-                                key, value = part.split(':', 1)
-                                player_info[key.strip().lower()] = value.strip()
-            except Exception as e:
-                print(f'獲取基本信息時出錯: {e}')
+            # 儲存解析後的球員資訊（內容沒有變動時不重寫）
+            def write_info():
+                save_record(player_output(player_id, 'info'), player_info)
+                register_player(player_id, 'info')
             
-            # 儲存解析後的球員資訊
-            with open(f'nba_player_data/player_{player_id}_info.json', 'w', encoding='utf-8') as f:
-                json.dump(player_info, f, ensure_ascii=False, indent=4)
+            changed = get_manifest().write_if_changed(
+                f'player_info/{player_id}', player_info, write_info, exists=lambda: player_exists(player_id, 'info')
+            )
                 
-            print(f'成功儲存球員 {player_id} 的個人資料')
+            if changed:
+                print(f'成功儲存球員 {player_id} 的個人資料')
+            else:
+                print(f'球員 {player_id} 的個人資料沒有變動')
             return player_info
         else:
-            print(f'獲取球員資料失敗，狀態碼: {response.status_code}')
+            print(f'獲取球員資料失敗，狀態碼: {status_code}')
             return None
     except Exception as e:
         print(f'爬取球員資料時發生錯誤: {e}')
@@ -121,32 +134,29 @@ def fetch_player_stats(player_id):
         endpoint = f'playercareerstats?PlayerID={player_id}&PerMode=PerGame'
         print(f'獲取球員統計數據: {endpoint}')
         
-        response = requests.get(f'{api_base_url}/{endpoint}', headers=headers)
+        response = http_get(f'{api_base_url}/{endpoint}', headers=headers)
         if response.status_code == 200:
             data = response.json()
             
             if 'resultSets' in data:
-                # 儲存原始數據
-                with open(f'nba_player_data/player_{player_id}_stats_raw.json', 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=4)
-                
-                # 轉換為更易讀的格式
-                stats = {}
+                # 原始回應壓縮封存到 nba_archive，內容相同時只記錄抓取時間
+                archive_payload('playercareerstats', player_id, response.content)
                 
-                for result_set in data['resultSets']:
-                    set_name = result_set['name']
-                    headers_list = result_set['headers']
-                    rows = result_set['rowSet']
-                    
-                    stats[set_name] = []
-                    for row in rows:
-                        stats[set_name].append({headers_list[i]: row[i] for i in range(len(headers_list))})
+                # 轉換為欄位式資料
+                stats = {name: decode_columns(result_set) for name, result_set in result_sets_by_name(data).items()}
+                def write_stats():
+                    save_table_set(player_output(player_id, 'stats'), stats)
+                    register_player(player_id, 'stats')
                 
-                # 儲存處理後的統計數據
-                with open(f'nba_player_data/player_{player_id}_stats.json', 'w', encoding='utf-8') as f:
-                    json.dump(stats, f, ensure_ascii=False, indent=4)
+                # 以原始回應的內容雜湊判斷是否有變動，沒有變動時不重寫檔案
+                changed = get_manifest().write_if_changed(
+                    f'player_stats/{player_id}', data, write_stats, exists=lambda: player_exists(player_id, 'stats')
+                )
                 
-                print(f'成功儲存球員 {player_id} 的統計數據')
+                if changed:
+                    print(f'成功儲存球員 {player_id} 的統計數據')
+                else:
+                    print(f'球員 {player_id} 的統計數據沒有變動')
                 return stats
             else:
                 print('無法解析統計數據回應')
@@ -158,8 +168,147 @@ def fetch_player_stats(player_id):
         print(f'爬取統計數據時發生錯誤: {e}')
         return None
 
+# 批次模式的檢查點檔案
+checkpoint_file = 'nba_player_data/bulk_checkpoint.json'
+
+# 函數：讀取批次檢查點
+def load_checkpoint(path=checkpoint_file):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        checkpoint = {}
+    checkpoint.setdefault('done', [])
+    checkpoint.setdefault('failed', [])
+    return checkpoint
+
+# 函數：寫入批次檢查點（先寫入暫存檔再取代，避免中斷時檔案損壞）
+def save_checkpoint(checkpoint, path=checkpoint_file):
+    tmp_path = path + '.tmp'
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+# 函數：把名稱或 PERSON_ID 轉換為球員資料，不需要互動式選擇
+def resolve_player(entry, index):
+    entry = entry.strip()
+    if entry.isdigit():
+        return index.get(entry) or {'PERSON_ID': int(entry), 'DISPLAY_FIRST_LAST': entry}
+
+    matches = index.search(entry)
+    if len(matches) == 1:
+        return matches[0]
+    # 有多個結果時，只接受名稱完全相同的那一位
+    exact = [p for p in matches if normalize_name(p['DISPLAY_FIRST_LAST']) == normalize_name(entry)]
+    if len(exact) == 1:
+        return exact[0]
+    if matches:
+        print(f'名稱 "{entry}" 有 {len(matches)} 位符合的球員，請改用 PERSON_ID')
+    else:
+        print(f'找不到球員: {entry}')
+    return None
+
+# 函數：讀取批次清單（每行一個球員名稱或 PERSON_ID，# 開頭為註解）
+def read_bulk_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+# 函數：爬取單一球員的個人資料與統計數據
+def scrape_player(player_id):
+    player_info = fetch_player_profile(player_id)
+    player_stats = fetch_player_stats(player_id)
+    return player_info is not None and player_stats is not None
+
+# 函數：判斷球員資料是否仍在有效期限內（增量模式用）
+# 統計數據與個人資料各自使用對應端點（playercareerstats / 個人資料頁）的有效期限
+def is_player_fresh(player_id, manifest):
+    return not (manifest.is_stale(f'player_stats/{player_id}', ttl_for(f'{api_base_url}/playercareerstats'))
+                or manifest.is_stale(f'player_info/{player_id}', ttl_for(f'{base_url}/player/{player_id}/profile')))
+
+# 函數：批次爬取多名球員，完成的球員會記錄在檢查點，中斷後可以從中斷處繼續
+# 增量模式 (delta=True) 不使用檢查點，而是略過資料清單中尚未過期的球員
+def bulk_scrape(entries, max_workers=4, resume=True, delta=False, retry_rounds=2):
+    index = get_player_index()
+    if index is None:
+        print('無法取得球員名單')
+        return None
+
+    if entries is None:
+        # 所有現役球員
+        players = [index.to_dict(row) for row in index.rows]
+    else:
+        players = [p for p in (resolve_player(entry, index) for entry in entries) if p]
+
+    manifest = get_manifest()
+    # 增量模式只在記憶體中記錄進度，不寫入檢查點，避免覆蓋可續傳的 --bulk 批次進度
+    checkpoint = load_checkpoint() if resume and not delta else {'done': [], 'failed': []}
+    done = set(checkpoint['done'])
+    pending = [p for p in players if p['PERSON_ID'] not in done]
+    if delta:
+        fresh = {p['PERSON_ID'] for p in pending if is_player_fresh(p['PERSON_ID'], manifest)}
+        for player_id in fresh:
+            manifest.skip(f'player_stats/{player_id}')
+        pending = [p for p in pending if p['PERSON_ID'] not in fresh]
+        done.update(fresh)
+    print(f'共 {len(players)} 位球員，已完成 {len(players) - len(pending)} 位，剩餘 {len(pending)} 位')
+
+    lock = threading.Lock()
+    failed = set()
+    # 失敗的球員放回重試佇列，等這一輪結束（斷路器冷卻）後再重試，最多 retry_rounds 輪
+    for round_number in range(retry_rounds + 1):
+        if round_number:
+            delay = backoff_delay(round_number)
+            print(f'{len(pending)} 位球員爬取失敗，{delay:.1f} 秒後重試（第 {round_number} 輪）')
+            time.sleep(delay)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(scrape_player, p['PERSON_ID']): p for p in pending}
+            for completed, future in enumerate(as_completed(futures), 1):
+                player = futures[future]
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    print(f"爬取 {player['DISPLAY_FIRST_LAST']} 時發生錯誤: {e}")
+                    ok = False
+                with lock:
+                    if ok:
+                        done.add(player['PERSON_ID'])
+                        failed.discard(player['PERSON_ID'])
+                    else:
+                        failed.add(player['PERSON_ID'])
+                    checkpoint['done'] = sorted(done)
+                    checkpoint['failed'] = sorted(failed)
+                    if not delta:
+                        save_checkpoint(checkpoint)
+                print(f"[{completed}/{len(pending)}] {player['DISPLAY_FIRST_LAST']} {'完成' if ok else '失敗'}")
+        pending = [p for p in pending if p['PERSON_ID'] in failed]
+        if not pending:
+            break
+
+    print(f'\n批次爬取完成：成功 {len(done)} 位，失敗 {len(failed)} 位')
+    manifest.write_changes()
+    write_summary('player_bulk_scrape')
+    return checkpoint
+
 # 主函數
 def main():
+    # 批次模式：--bulk <檔案> 或 --all（所有現役球員）
+    if '--bulk' in sys.argv or '--all' in sys.argv:
+        workers = 4
+        for arg in sys.argv[1:]:
+            if arg.startswith('--workers='):
+                workers = int(arg.split('=', 1)[1])
+        if '--all' in sys.argv:
+            entries = None
+        else:
+            position = sys.argv.index('--bulk')
+            if position + 1 >= len(sys.argv):
+                print('錯誤：--bulk 需要提供球員清單檔案')
+                return
+            entries = read_bulk_file(sys.argv[position + 1])
+        bulk_scrape(entries, max_workers=workers, resume='--restart' not in sys.argv, delta='--delta' in sys.argv)
+        return
+
     if len(sys.argv) > 1:
         # 從命令行參數獲取球員名稱
         player_name = ' '.join(sys.argv[1:]) if '--search-only' not in sys.argv else ' '.join([arg for arg in sys.argv[1:] if arg != '--search-only'])
@@ -206,12 +355,14 @@ def main():
         
         # 爬取球員統計數據
         player_stats = fetch_player_stats(player_id)
+        get_manifest().write_changes()
+        write_summary('player_specific_scraper')
         
         print(f"\n所有 {selected_player['DISPLAY_FIRST_LAST']} 的資料爬取完成！\n")
         print(f"資料已儲存到 nba_player_data 目錄:")
-        print(f"1. 個人資料頁: player_{player_id}_profile.html")
-        print(f"2. 個人基本資訊: player_{player_id}_info.json")
-        print(f"3. 統計數據: player_{player_id}_stats.json")
+        print(f"1. 個人資料頁: 封存於 nba_archive (python nba_archive.py player_profile {player_id})")
+        print(f"2. 個人基本資訊: {player_path(player_id, 'info')}.json")
+        print(f"3. 統計數據: {player_path(player_id, 'stats')}")
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file